@@ -0,0 +1,351 @@
+# benchmarks/bench_course_model.py
+
+"""
+Benchmark suite for course_model.
+
+Generates synthetic presets of configurable size (faculties x departments x
+courses) together with large option payloads, and measures the time and peak
+memory of every pipeline stage: generate_structure, _apply_customizations,
+_merge_nested_subjects, _filter_nested_subjects and _format_output for each
+output format, plus prefix, fuzzy and combined queries against a SubjectIndex
+of the catalog, with the recall of fuzzy queries against brute-force scoring. Results are written as JSON so that releases can be compared.
+
+Usage:
+    python benchmarks/bench_course_model.py --sizes small,medium --output results.json
+    python benchmarks/bench_course_model.py --faculties 100 --departments 100 --courses 100
+    python benchmarks/bench_course_model.py --sizes medium --compare baseline.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Allow running from a source checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from course_model.core import configure_cache, generate_structure  # noqa: E402
+from course_model.registry import preset_registry  # noqa: E402
+from course_model.search import SubjectIndex, _normalize, _trigrams  # noqa: E402
+from course_model.utils import (  # noqa: E402
+    _apply_customizations, _filter_nested_subjects, _format_output, _merge_nested_subjects
+)
+
+# (faculties, departments per faculty, courses per department)
+SIZES = {
+    "small": (10, 10, 10),        # 1k subjects
+    "medium": (20, 25, 100),      # 50k subjects
+    "large": (50, 50, 100),       # 250k subjects
+    "xlarge": (100, 100, 100),    # 1M subjects
+}
+
+FORMATS = ("standard", "db_schema", "columnar")
+
+# Queries per search benchmark; each timing covers the whole batch
+SEARCH_QUERIES = 100
+# Fuzzy queries whose hits are checked against scoring every name
+RECALL_QUERIES = 20
+
+
+def make_preset(faculties, departments, courses, levels=6):
+    """
+    Builds a synthetic university-style preset.
+
+    Returns:
+        dict: A preset with `levels` and a faculty -> department -> courses tree.
+    """
+    return {
+        "levels": [f"Year {i}" for i in range(1, levels + 1)],
+        "subjects": {
+            f"Faculty {f}": {
+                f"Department {f}.{d}": [f"Course {f}.{d}.{c}" for c in range(courses)]
+                for d in range(departments)
+            }
+            for f in range(faculties)
+        }
+    }
+
+
+def make_options(faculties, departments, courses, seed=0, custom_ratio=0.1, exclude_ratio=0.05):
+    """
+    Builds a large option payload for a synthetic preset: new courses for a
+    share of the departments, a list of excluded courses and metadata.
+
+    Returns:
+        dict: Options accepted by generate_structure.
+    """
+    rng = random.Random(seed)
+    custom_subjects = {}
+    for f in range(faculties):
+        for d in range(departments):
+            if rng.random() < custom_ratio:
+                custom_subjects.setdefault(f"Faculty {f}", {})[f"Department {f}.{d}"] = [
+                    f"Elective {f}.{d}.{c}" for c in range(max(1, courses // 10))
+                ]
+    # A new faculty, so merging also has to insert whole subtrees
+    custom_subjects["Faculty New"] = {"Department New": [f"New Course {c}" for c in range(courses)]}
+
+    total = faculties * departments * courses
+    exclude_subjects = [
+        f"Course {rng.randrange(faculties)}.{rng.randrange(departments)}.{rng.randrange(courses)}"
+        for _ in range(max(1, int(total * exclude_ratio)))
+    ]
+    return {
+        "custom_subjects": custom_subjects,
+        "exclude_subjects": exclude_subjects,
+        "custom_levels": ["Year 7"],
+        "exclude_levels": ["Year 1"],
+        "integration_metadata": {"external_id": "BENCH", "lms_tag": "bench"}
+    }
+
+
+def make_search_queries(faculties, departments, courses, seed=0):
+    """
+    Builds search queries for a synthetic preset: typed prefixes of existing
+    course names, the same names with two adjacent characters swapped, and
+    short queries that match no prefix, so search() falls back to fuzzy matching.
+
+    Returns:
+        dict: Query lists keyed by 'prefix', 'fuzzy' and 'miss'.
+    """
+    rng = random.Random(seed)
+    names = [
+        f"Course {rng.randrange(faculties)}.{rng.randrange(departments)}.{rng.randrange(courses)}"
+        for _ in range(SEARCH_QUERIES)
+    ]
+    fuzzy = []
+    for name in names:
+        position = rng.randrange(len(name) - 1)
+        fuzzy.append(name[:position] + name[position + 1] + name[position] + name[position + 2:])
+    return {
+        "prefix": [name[:rng.randint(3, len(name))] for name in names],
+        "fuzzy": fuzzy,
+        "miss": [name[:4].replace("o", "u") + name[6:] for name in names]
+    }
+
+
+def fuzzy_recall(index, queries, limit=10, min_score=0.3):
+    """
+    Compares search_fuzzy() with brute-force Dice scoring of every indexed name.
+
+    Returns:
+        float: The share of the brute-force top `limit` names (ties at the
+        last score count as any of them) that search_fuzzy() returned.
+    """
+    name_grams = [(name, _trigrams(_normalize(name))) for name in index._names]
+    expected_total = found_total = 0
+    for query in queries:
+        grams = _trigrams(_normalize(query))
+        scores = {}
+        for name, other in name_grams:
+            score = 2.0 * len(grams & other) / (len(grams) + len(other))
+            if score >= min_score:
+                scores[name] = max(score, scores.get(name, 0.0))
+        expected = min(limit, len(scores))
+        if not expected:
+            continue
+        cutoff = sorted(scores.values(), reverse=True)[expected - 1]
+        hits = {hit["name"] for hit in index.search_fuzzy(query, limit, min_score)}
+        expected_total += expected
+        found_total += min(expected, sum(scores.get(name, 0.0) >= cutoff for name in hits))
+    return found_total / expected_total if expected_total else 1.0
+
+
+def measure(func, repeat):
+    """
+    Runs func `repeat` times for timing, then once more under tracemalloc.
+
+    Returns:
+        dict: min/median/max seconds and the peak traced memory in bytes.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds_min": min(timings),
+        "seconds_median": statistics.median(timings),
+        "seconds_max": max(timings),
+        "peak_memory_bytes": peak
+    }
+
+
+def run_size(name, faculties, departments, courses, repeat, seed):
+    """
+    Runs every benchmark for one synthetic catalog size.
+
+    Returns:
+        list: One result dictionary per benchmark.
+    """
+    preset = make_preset(faculties, departments, courses)
+    options = make_options(faculties, departments, courses, seed=seed)
+    school_type = f"bench_{name}"
+    preset_registry.register(school_type, preset)
+
+    customized = _apply_customizations(preset, options)
+    index = SubjectIndex()
+    index.add_preset(school_type, preset)
+    queries = make_search_queries(faculties, departments, courses, seed=seed)
+    merged = _merge_nested_subjects(preset["subjects"], options["custom_subjects"])
+
+    benchmarks = [
+        ("generate_structure", lambda: generate_structure(school_type, **options)),
+        ("_apply_customizations", lambda: _apply_customizations(preset, options)),
+        ("_merge_nested_subjects",
+         lambda: _merge_nested_subjects(preset["subjects"], options["custom_subjects"])),
+        ("_filter_nested_subjects",
+         lambda: _filter_nested_subjects(merged, options["exclude_subjects"])),
+    ]
+    for output_format in FORMATS:
+        format_options = dict(options, output_format=output_format)
+        benchmarks.append((
+            f"_format_output[{output_format}]",
+            lambda format_options=format_options: _format_output(customized, format_options)
+        ))
+    benchmarks.extend([
+        (f"search_prefix[{SEARCH_QUERIES} queries]",
+         lambda: [index.search_prefix(query) for query in queries["prefix"]]),
+        (f"search_fuzzy[{SEARCH_QUERIES} queries]",
+         lambda: [index.search_fuzzy(query) for query in queries["fuzzy"]]),
+        (f"search[{SEARCH_QUERIES} prefix misses]",
+         lambda: [index.search(query) for query in queries["miss"]]),
+    ])
+
+    results = []
+    try:
+        for benchmark, func in benchmarks:
+            result = {
+                "benchmark": benchmark,
+                "size": name,
+                "faculties": faculties,
+                "departments": departments,
+                "courses": courses,
+                "subjects": faculties * departments * courses,
+                "exclusions": len(options["exclude_subjects"]),
+            }
+            result.update(measure(func, repeat))
+            if benchmark.startswith("search_fuzzy"):
+                result["recall"] = fuzzy_recall(index, queries["fuzzy"][:RECALL_QUERIES])
+            results.append(result)
+            print(
+                f"{name:>8} {benchmark:<38} "
+                f"{result['seconds_median'] * 1000:10.2f} ms "
+                f"{result['peak_memory_bytes'] / 2 ** 20:10.2f} MiB"
+                + (f" recall {result['recall']:.3f}" if "recall" in result else ""),
+                file=sys.stderr
+            )
+    finally:
+        preset_registry.unregister(school_type)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares median timings and peak memory against a previous results file.
+
+    Returns:
+        list: Human-readable descriptions of regressions beyond the threshold.
+    """
+    previous = {(r["size"], r["benchmark"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["size"], result["benchmark"]))
+        if old is None:
+            continue
+        for metric in ("seconds_median", "peak_memory_bytes"):
+            if old[metric] and result[metric] > old[metric] * threshold:
+                regressions.append(
+                    f"{result['size']} {result['benchmark']} {metric}: "
+                    f"{old[metric]:.6g} -> {result[metric]:.6g} "
+                    f"({result[metric] / old[metric]:.2f}x)"
+                )
+    return regressions
+
+
+def _package_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return "unknown"
+    try:
+        return version("course-model")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default="small,medium",
+                        help=f"Comma separated sizes: {', '.join(SIZES)} (default: small,medium)")
+    parser.add_argument("--faculties", type=int, help="Custom size: number of faculties")
+    parser.add_argument("--departments", type=int, default=10,
+                        help="Custom size: departments per faculty")
+    parser.add_argument("--courses", type=int, default=10, help="Custom size: courses per department")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for option payloads")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="Previous JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Allowed slowdown/memory ratio when comparing (default: 1.2)")
+    args = parser.parse_args(argv)
+
+    if args.faculties:
+        sizes = {"custom": (args.faculties, args.departments, args.courses)}
+    else:
+        unknown = [s for s in args.sizes.split(",") if s not in SIZES]
+        if unknown:
+            parser.error(f"Unknown sizes: {', '.join(unknown)}")
+        sizes = {s: SIZES[s] for s in args.sizes.split(",")}
+
+    # Measure the pipeline itself, not the result cache
+    configure_cache(maxsize=0)
+
+    results = []
+    for name, (faculties, departments, courses) in sizes.items():
+        results.extend(run_size(name, faculties, departments, courses, args.repeat, args.seed))
+
+    report = {
+        "course_model_version": _package_version(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fp:
+            regressions = compare(results, json.load(fp), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+# course_model/aio.py
+
+"""
+This module provides asyncio counterparts of generate_structure and the
+db_schema export, for services that must not block their event loop.
+
+Customization and formatting run in an executor, and at most
+`max_concurrency` computations run at once per event loop. Identical
+requests that arrive while one is already being computed share that
+computation, and every caller still receives its own copy of the result.
+
+Rows are streamed from the executor in batches, with the next batch prepared
+while the current one is consumed, so exports can write to async sinks
+without buffering the whole table.
+
+Example:
+    from course_model.aio import generate_structure_async, iter_db_rows_async, write_jsonl_async
+
+    structure = await generate_structure_async("university", exclude_subjects=["Drama"])
+
+    rows = iter_db_rows_async("university", custom_subjects=tenant_subjects)
+    await write_jsonl_async(rows, response.write)
+"""
+
+import asyncio
+import csv
+import io
+import json
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+from .core import generate_structure
+from .export import iter_db_rows, table_columns
+from .utils import _canonicalize_options, _copy_output, DEFAULT_PATH_COLUMNS
+
+_settings = {"max_concurrency": 4, "executor": None}
+_loop_states = weakref.WeakKeyDictionary() # event loop -> _LoopState
+
+
+class _LoopState:
+    """
+    Per-event-loop concurrency limit and in-flight computations.
+    """
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = {}  # request key -> _Flight
+
+
+class _Flight:
+    """
+    A computation shared by every caller that requested the same structure.
+    """
+
+    def __init__(self):
+        self.task = None
+        self.waiters = 0
+
+
+def configure_async(max_concurrency=None, executor=None):
+    """
+    Configures how async calls are executed.
+
+    Args:
+        max_concurrency (int): Maximum number of computations running at once
+                               per event loop (default 4).
+        executor (Executor): The concurrent.futures executor to run computations in.
+                             None (default) uses the event loop's default executor.
+                             Row streaming always runs in a thread, since
+                             generators cannot be sent to other processes.
+
+    Raises:
+        ValueError: If max_concurrency is not positive.
+        TypeError: If executor is not an Executor.
+    """
+    if max_concurrency is not None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer.")
+        _settings["max_concurrency"] = max_concurrency
+    if executor is not None:
+        if not isinstance(executor, Executor):
+            raise TypeError("executor must be a concurrent.futures.Executor instance.")
+        _settings["executor"] = executor
+
+
+async def generate_structure_async(school_type='secondary', **options):
+    """
+    Generates a course structure without blocking the event loop.
+
+    Concurrent calls with the same school_type and options share one
+    computation. Exceptions are raised in every caller that shared it.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        **options: Customization options, see generate_structure.
+
+    Returns:
+        dict or list: The generated course structure, like generate_structure.
+
+    Raises:
+        ValueError: If an invalid school_type is provided or options are malformed.
+        TypeError: If an option has an incorrect type.
+    """
+    state = _get_loop_state()
+    compute = partial(generate_structure, school_type, **options)
+    try:
+        key = (school_type, _canonicalize_options(options))
+    except (TypeError, RecursionError):
+        key = None # Unhashable options cannot be coalesced
+
+    if key is None:
+        return (await _run_limited(state, _settings["executor"], compute))[0]
+
+    flight = state.in_flight.get(key)
+    if flight is None:
+        flight = _Flight()
+        flight.task = asyncio.ensure_future(_run_shared(state, key, flight, compute))
+        state.in_flight[key] = flight
+    flight.waiters += 1
+    # A cancelled caller must not cancel the computation other callers wait for
+    results = await asyncio.shield(flight.task)
+    return results.pop()
+
+
+def iter_db_rows_async(school_type='secondary', as_tuples=False, batch_size=1000, **options):
+    """
+    Asynchronously iterates over the rows of the db_schema output format.
+
+    Rows are generated in a worker thread, batch_size rows at a time. The next
+    batch is generated while the current one is consumed.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        as_tuples (bool): If True, rows are tuples, see iter_db_rows.
+        batch_size (int): Number of rows generated per executor call.
+        **options: Customization options, see generate_structure.
+
+    Returns:
+        async iterator: (table, row) pairs, like iter_db_rows. Invalid options
+                        raise when the first row is requested.
+
+    Raises:
+        ValueError: If batch_size is not positive.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer.")
+    rows = iter_db_rows(school_type, as_tuples=as_tuples, **options)
+    return _iter_batches(rows, batch_size)
+
+
+async def write_jsonl_async(rows, write, chunk_size=1000, path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Writes tagged db_schema rows as JSON Lines to an async sink, like write_jsonl.
+
+    Args:
+        rows (iterable or async iterable): (table, row) pairs, e.g. from
+                                           iter_db_rows_async().
+        write (callable): Called with each chunk of text. If it returns an
+                          awaitable (e.g. an async file's write method), it is awaited.
+        chunk_size (int): Number of lines per chunk.
+        path_columns (list): The path_columns option used to generate the rows.
+
+    Returns:
+        dict: The number of rows written per table.
+
+    Raises:
+        ValueError: If a row belongs to an unknown table or chunk_size is invalid.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    columns = table_columns(path_columns)
+    counts = {table: 0 for table in columns}
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    lines = []
+    async for table, row in _aiter(rows):
+        if table not in counts:
+            raise ValueError(f"Unknown table: '{table}'.")
+        if not isinstance(row, dict):
+            row = dict(zip(columns[table], row))
+        lines.append(encoder.encode({"table": table, "row": row}))
+        counts[table] += 1
+        if len(lines) >= chunk_size:
+            await _write(write, "\n".join(lines) + "\n")
+            lines.clear()
+    if lines:
+        await _write(write, "\n".join(lines) + "\n")
+    return counts
+
+
+async def write_csv_async(rows, write_levels, write_subjects, chunk_size=1000,
+                          path_columns=DEFAULT_PATH_COLUMNS, write_level_subjects=None):
+    """
+    Writes tagged db_schema rows as CSV to one async sink per table, like write_csv.
+
+    Args:
+        rows (iterable or async iterable): (table, row) pairs, e.g. from
+                                           iter_db_rows_async().
+        write_levels (callable): Called with each chunk of the levels table CSV,
+                                 and awaited if it returns an awaitable.
+        write_subjects (callable): Same, for the subjects table.
+        chunk_size (int): Number of rows buffered per table before writing.
+        path_columns (list): The path_columns option used to generate the rows.
+        write_level_subjects (callable): Same, for the level_subjects table. Required
+                                         if the rows were generated with offerings.
+
+    Returns:
+        dict: The number of rows written per table.
+
+    Raises:
+        ValueError: If a row belongs to an unknown table (or to level_subjects
+                    without write_level_subjects), or chunk_size is invalid.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    columns = table_columns(path_columns)
+    sinks = {"levels_table": write_levels, "subjects_table": write_subjects}
+    if write_level_subjects is None:
+        del columns["level_subjects"]
+    else:
+        sinks["level_subjects"] = write_level_subjects
+    counts = {table: 0 for table in columns}
+    buffers = {table: [] for table in columns}
+    for table, header in columns.items():
+        await _write(sinks[table], _csv_text([header]))
+
+    async for table, row in _aiter(rows):
+        buffer = buffers.get(table)
+        if buffer is None:
+            if table == "level_subjects":
+                raise ValueError("level_subjects rows require write_level_subjects.")
+            raise ValueError(f"Unknown table: '{table}'.")
+        if isinstance(row, dict):
+            row = tuple(row.get(column, '') for column in columns[table])
+        buffer.append(row)
+        if len(buffer) >= chunk_size:
+            await _write(sinks[table], _csv_text(buffer))
+            counts[table] += len(buffer)
+            buffer.clear()
+
+    for table, buffer in buffers.items():
+        if buffer:
+            await _write(sinks[table], _csv_text(buffer))
+            counts[table] += len(buffer)
+    return counts
+
+
+def _get_loop_state():
+    """
+    Helper to return the state of the running event loop, recreating it when
+    max_concurrency was changed.
+    """
+    loop = asyncio.get_running_loop()
+    state = _loop_states.get(loop)
+    if state is None or state.max_concurrency != _settings["max_concurrency"]:
+        previous = state
+        state = _LoopState(_settings["max_concurrency"])
+        if previous is not None:
+            state.in_flight = previous.in_flight
+        _loop_states[loop] = state
+    return state
+
+
+async def _run_limited(state, executor, func, *args):
+    """
+    Helper to run a function in an executor once the concurrency limit allows it.
+    Returns a one-item list, the shape _run_shared hands out results in.
+    """
+    async with state.semaphore:
+        loop = asyncio.get_running_loop()
+        return [await loop.run_in_executor(executor, func, *args)]
+
+
+async def _run_shared(state, key, flight, compute):
+    """
+    Helper to run a coalesced computation. Returns one result per waiter:
+    the original structure and a copy for every other waiter.
+    """
+    try:
+        structure = (await _run_limited(state, _settings["executor"], compute))[0]
+    finally:
+        # Later requests start a new computation, so the waiter count is final
+        state.in_flight.pop(key, None)
+    if flight.waiters < 2:
+        return [structure]
+    loop = asyncio.get_running_loop()
+    copies = await loop.run_in_executor(None, _copy_many, structure, flight.waiters - 1)
+    copies.append(structure)
+    return copies
+
+
+def _copy_many(structure, count):
+    """
+    Helper to make independent copies of a structure, for coalesced callers.
+    """
+    return [_copy_output(structure) for _ in range(count)]
+
+
+async def _iter_batches(rows, batch_size):
+    """
+    Helper to advance a row generator in a worker thread, one batch ahead of
+    the consumer.
+    """
+    state = _get_loop_state()
+    executor = _settings["executor"]
+    if isinstance(executor, ProcessPoolExecutor):
+        executor = None # Generators cannot be pickled
+    next_batch = partial(_run_limited, state, executor, _take, rows, batch_size)
+
+    pending = asyncio.ensure_future(next_batch())
+    try:
+        while True:
+            batch = (await pending)[0]
+            pending = None
+            if len(batch) == batch_size:
+                pending = asyncio.ensure_future(next_batch())
+            for row in batch:
+                yield row
+            if pending is None:
+                return
+    finally:
+        if pending is not None:
+            # The generator may still be running in a thread; wait before closing it
+            await asyncio.wait([pending])
+        rows.close()
+
+
+def _take(rows, count):
+    """
+    Helper to pull up to `count` items from an iterator.
+    """
+    return list(islice(rows, count))
+
+
+async def _aiter(rows):
+    """
+    Helper to iterate over a synchronous or asynchronous iterable.
+    """
+    if hasattr(rows, "__aiter__"):
+        async for item in rows:
+            yield item
+    else:
+        for item in rows:
+            yield item
+
+
+async def _write(write, text):
+    """
+    Helper to call a sink, awaiting its result if it is awaitable.
+    """
+    result = write(text)
+    if hasattr(result, "__await__"):
+        await result
+
+
+def _csv_text(rows):
+    """
+    Helper to format rows as CSV text.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
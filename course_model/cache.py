@@ -0,0 +1,151 @@
+# course_model/cache.py
+
+"""
+This module provides a small, thread-safe result cache used by
+generate_structure to avoid rebuilding identical course structures.
+Entries are evicted in least-recently-used order once the cache is full,
+and can optionally expire after a fixed time-to-live.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class StructureCache:
+    """
+    A bounded LRU cache with optional TTL expiry and hit/miss/eviction counters.
+
+    Keys are expected to be hashable tuples whose first element is the
+    school type, which allows invalidating a single school type at once.
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        """
+        Args:
+            maxsize (int): Maximum number of cached entries. 0 disables caching.
+            ttl (float): Optional number of seconds after which an entry expires.
+                         None means entries never expire.
+        """
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.maxsize = 0
+        self.ttl = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(maxsize=maxsize, ttl=ttl)
+
+    def configure(self, maxsize=None, ttl=None):
+        """
+        Updates the cache limits. Entries exceeding the new size are evicted.
+
+        Args:
+            maxsize (int): New maximum number of entries, or None to keep the current one.
+            ttl (float): New time-to-live in seconds, or None to keep the current one.
+                         Pass 0 to disable expiry.
+
+        Raises:
+            ValueError: If maxsize or ttl is negative.
+        """
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("maxsize must be zero or a positive integer.")
+        if ttl is not None and ttl < 0:
+            raise ValueError("ttl must be zero or a positive number.")
+
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl or None
+            self._evict_overflow()
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting the least recently used entries if needed.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            self._evict_overflow()
+
+    def invalidate(self, school_type=None):
+        """
+        Removes cached entries.
+
+        Args:
+            school_type (str): If given, only entries for this school type are removed.
+                               Otherwise the whole cache is cleared.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            if school_type is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale_keys = [key for key in self._entries if key[0] == school_type]
+            for key in stale_keys:
+                del self._entries[key]
+            return len(stale_keys)
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, current size, maxsize and ttl.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl
+            }
+
+    def reset_stats(self):
+        """
+        Resets the hit, miss and eviction counters without touching cached entries.
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict_overflow(self):
+        # Caller must hold the lock
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,413 @@
+# course_model/cli.py
+
+"""
+Command-line export tool for course_model.
+
+Reads tenant specs from a JSON Lines file, one {"tenant": ..., "school_type":
+..., "options": {...}} object per line, generates every structure in a pool
+of worker processes and writes them as standard or db_schema JSON, CSV or
+JSON Lines, to stdout or one file per tenant. Progress and throughput are
+reported on stderr. Duplicate tenants, and with --output-dir tenants whose
+names map to the same file name, are rejected.
+
+Usage:
+    course-model tenants.jsonl --format db_schema > catalog.jsonl
+    course-model tenants.jsonl --format csv --output-dir exports/ --workers 8
+    cat tenants.jsonl | course-model - --format jsonl --quiet
+
+Output:
+    standard, db_schema  stdout: one {"tenant": ..., "structure": ...} line per tenant.
+                         --output-dir: <tenant>.json
+    jsonl                stdout: one {"tenant": ..., "table": ..., "row": ...} line per row.
+                         --output-dir: <tenant>.jsonl, like write_jsonl()
+    csv                  stdout: the --table rows of every tenant, with a leading
+                         tenant column. --output-dir: <tenant>.levels.csv,
+                         <tenant>.subjects.csv and, with offerings,
+                         <tenant>.level_subjects.csv
+"""
+
+# Only lightweight modules are imported here; course_model itself and
+# concurrent.futures are imported when they are needed, so the command
+# starts quickly and worker processes only load what they use.
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+FORMATS = ("standard", "db_schema", "jsonl", "csv")
+_TABLES = ("levels_table", "subjects_table", "level_subjects")
+_CSV_SUFFIXES = {
+    "levels_table": ".levels.csv",
+    "subjects_table": ".subjects.csv",
+    "level_subjects": ".level_subjects.csv"
+}
+_UNSAFE_FILENAME_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="course-model", description=__doc__.split("\n\n")[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__.split("\n\n", 2)[2]
+    )
+    parser.add_argument("specs", help="JSON Lines file of tenant specs, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, default="standard",
+                        help="Output format (default: standard)")
+    parser.add_argument("--output-dir", "-o",
+                        help="Write one file per tenant into this directory (default: stdout)")
+    parser.add_argument("--table", choices=_TABLES, default="subjects_table",
+                        help="Table written by --format csv to stdout (default: subjects_table)")
+    parser.add_argument("--workers", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes; 1 generates in this process (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=32,
+                        help="Tenants sent to a worker at a time (default: 32)")
+    parser.add_argument("--quiet", "-q", action="store_true",
+                        help="Only report errors on stderr")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be a positive integer")
+    if args.chunksize < 1:
+        parser.error("--chunksize must be a positive integer")
+
+    errors = []
+    specs = []
+    tenant_lines, file_names = {}, {}
+    with _open_input(args.specs) as fp:
+        for line_number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            try:
+                spec = _parse_spec(line, line_number)
+                _check_unique(spec, line_number, tenant_lines, file_names, args.output_dir)
+            except ValueError as error:
+                errors.append(f"line {line_number}: {error}")
+            else:
+                specs.append(spec)
+
+    csv_columns = None
+    if args.format == "csv" and not args.output_dir:
+        # Every tenant shares one header, so their path_columns must agree
+        specs, csv_columns = _shared_csv_columns(specs, args.table, errors)
+        if csv_columns is None:
+            for error in errors:
+                print(f"error: {error}", file=sys.stderr)
+            return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    settings = {
+        "format": args.format,
+        "output_dir": args.output_dir,
+        "table": args.table
+    }
+    chunks = [specs[i:i + args.chunksize] for i in range(0, len(specs), args.chunksize)]
+    progress = _Progress(len(specs), quiet=args.quiet)
+    out = sys.stdout.buffer if hasattr(sys.stdout, "buffer") else None
+
+    if csv_columns and specs:
+        _write_stdout(out, _csv_text([("tenant",) + csv_columns]))
+
+    for results in _map_chunks(chunks, settings, args.workers):
+        for tenant, payload, size, error in results:
+            if error is not None:
+                errors.append(f"tenant {tenant}: {error}")
+            elif payload:
+                _write_stdout(out, payload)
+            progress.update(size, error is not None)
+    if out is not None:
+        out.flush()
+    else:
+        sys.stdout.flush()
+
+    progress.finish()
+    for error in errors:
+        print(f"error: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def _parse_spec(line, line_number):
+    """
+    Helper to parse one tenant spec into (tenant, file name, school_type, options).
+    Tenants without a name are named after their line number.
+    """
+    try:
+        spec = json.loads(line)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"invalid JSON ({error.msg})")
+    if not isinstance(spec, dict):
+        raise ValueError("a tenant spec must be a JSON object")
+    options = spec.get("options", {})
+    if not isinstance(options, dict):
+        raise ValueError("'options' must be a JSON object")
+    tenant = str(spec.get("tenant", line_number))
+    file_name = _UNSAFE_FILENAME_CHARACTERS.sub("_", tenant) or str(line_number)
+    return tenant, file_name, spec.get("school_type", "secondary"), options
+
+
+def _check_unique(spec, line_number, tenant_lines, file_names, output_dir):
+    """
+    Helper to reject a tenant that was already listed or, when writing files,
+    whose file name is already used by another tenant (ignoring case, for
+    case-insensitive file systems). Parallel workers would otherwise overwrite
+    each other's files. Records the spec in tenant_lines and file_names.
+
+    Raises:
+        ValueError: If the tenant or its file name is taken.
+    """
+    tenant, file_name = spec[0], spec[1]
+    if tenant in tenant_lines:
+        raise ValueError(
+            f"duplicate tenant {tenant!r}, first listed on line {tenant_lines[tenant]}"
+        )
+    if output_dir:
+        other = file_names.get(file_name.casefold())
+        if other is not None:
+            raise ValueError(
+                f"tenant {tenant!r} would be written to the same files as tenant "
+                f"{other[0]!r} on line {other[1]} ({file_name!r})"
+            )
+        file_names[file_name.casefold()] = (tenant, line_number)
+    tenant_lines[tenant] = line_number
+
+
+def _map_chunks(chunks, settings, workers):
+    """
+    Helper to render chunks in order, in this process or in a process pool.
+    """
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield _render_chunk(chunk, settings)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        # map() keeps the input order, so stdout output is deterministic
+        yield from executor.map(_render_chunk, chunks, [settings] * len(chunks))
+
+
+def _render_chunk(chunk, settings):
+    """
+    Renders the tenants of one chunk. Runs in a worker process, so it must stay
+    a module-level function. Files are written by the worker itself; output for
+    stdout is returned as bytes.
+
+    Returns:
+        list: (tenant, payload bytes, bytes rendered, error message) per tenant.
+    """
+    results = []
+    for tenant, file_name, school_type, options in chunk:
+        try:
+            payload, size = _render(tenant, file_name, school_type, dict(options), settings)
+            results.append((tenant, payload, size, None))
+        except (ValueError, TypeError, OSError) as error:
+            results.append((tenant, b"", 0, str(error)))
+    return results
+
+
+def _render(tenant, file_name, school_type, options, settings):
+    """
+    Helper to render one tenant, returning (stdout payload, bytes rendered).
+    """
+    output_format = settings["format"]
+    output_dir = settings["output_dir"]
+    tenant_json = json.dumps(tenant, ensure_ascii=False).encode("utf-8")
+
+    if output_format in ("standard", "db_schema"):
+        from .serialize import generate_json
+
+        options['output_format'] = output_format
+        body = generate_json(school_type, **options)[0]
+        if output_dir:
+            _write_file(os.path.join(output_dir, file_name + ".json"), body)
+            return b"", len(body)
+        payload = b'{"tenant":' + tenant_json + b',"structure":' + body + b'}\n'
+        return payload, len(payload)
+
+    from .export import iter_db_rows, write_csv, write_jsonl
+    from .utils import DEFAULT_PATH_COLUMNS
+
+    options.pop('output_format', None)
+    path_columns = options.get('path_columns', DEFAULT_PATH_COLUMNS)
+    table = settings["table"]
+    # JSON Lines keep the dictionary rows write_jsonl() would write; CSV needs tuples
+    rows = iter_db_rows(school_type, as_tuples=output_format == "csv", **options)
+
+    if output_format == "jsonl":
+        if output_dir:
+            paths = [os.path.join(output_dir, file_name + ".jsonl")]
+            with _removed_on_error(paths):
+                write_jsonl(rows, paths[0], path_columns=path_columns)
+            return b"", os.path.getsize(paths[0])
+        payload = _jsonl_bytes(tenant_json, rows)
+        return payload, len(payload)
+
+    if output_dir:
+        paths = {
+            table: os.path.join(output_dir, file_name + suffix)
+            for table, suffix in _CSV_SUFFIXES.items()
+        }
+        if options.get('offerings', False) is False:
+            del paths["level_subjects"]
+        with _removed_on_error(paths.values()):
+            write_csv(
+                rows, paths["levels_table"], paths["subjects_table"], path_columns=path_columns,
+                level_subjects_file=paths.get("level_subjects")
+            )
+        return b"", sum(os.path.getsize(path) for path in paths.values())
+
+    payload = _csv_text((tenant,) + row for row_table, row in rows if row_table == table)
+    return payload, len(payload)
+
+
+def _jsonl_bytes(tenant_json, rows):
+    """
+    Helper to render dictionary rows as tenant-tagged JSON Lines.
+    """
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    return b"".join(
+        b'{"tenant":' + tenant_json + b',"table":"' + table.encode("ascii") + b'","row":'
+        + encode(row).encode("utf-8") + b'}\n'
+        for table, row in rows
+    )
+
+
+@contextmanager
+def _removed_on_error(paths):
+    """
+    Helper to delete a tenant's partially written files if rendering fails.
+    Rows are generated lazily, so invalid options only fail once files are open.
+    """
+    try:
+        yield
+    except BaseException:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+
+def _shared_csv_columns(specs, table, errors):
+    """
+    Helper to validate the path_columns of every spec and return the columns
+    of a table shared by all of them. Specs with invalid path_columns are
+    reported in errors and dropped.
+
+    Returns:
+        tuple: (valid specs, columns). columns is None if the specs disagree.
+    """
+    from .export import table_columns
+    from .utils import DEFAULT_PATH_COLUMNS, _validate_options
+
+    valid_specs, columns, first_tenant = [], None, None
+    for spec in specs:
+        tenant, options = spec[0], spec[3]
+        path_columns = options.get('path_columns', DEFAULT_PATH_COLUMNS)
+        try:
+            _validate_options({'path_columns': path_columns})
+        except (ValueError, TypeError) as error:
+            errors.append(f"tenant {tenant}: {error}")
+            continue
+        tenant_columns = table_columns(path_columns)[table]
+        if columns is None:
+            columns, first_tenant = tenant_columns, tenant
+        elif tenant_columns != columns:
+            errors.append(
+                f"tenant {tenant}: path_columns differ from tenant {first_tenant}; they must "
+                "be the same for every tenant when writing CSV to stdout"
+            )
+            return valid_specs, None
+        valid_specs.append(spec)
+    return valid_specs, columns if columns is not None else ()
+
+
+def _csv_text(rows):
+    """
+    Helper to format rows as UTF-8 CSV bytes.
+    """
+    import csv
+    import io
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _write_file(path, data):
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+
+def _write_stdout(out, data):
+    if out is not None:
+        out.write(data)
+    else:
+        sys.stdout.write(data.decode("utf-8"))
+
+
+def _open_input(path):
+    if path == "-":
+        return _StdinContext()
+    return open(path, "r", encoding="utf-8")
+
+
+class _StdinContext:
+    """
+    Context manager yielding stdin without closing it.
+    """
+
+    def __enter__(self):
+        return sys.stdin
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Progress:
+    """
+    Reports tenants done, throughput and errors on stderr, at most a few times
+    per second. On a terminal the report is updated in place.
+    """
+
+    def __init__(self, total, quiet=False, interval=0.5):
+        self.total = total
+        self.quiet = quiet
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.start = self.last_report = time.perf_counter()
+        self.in_place = sys.stderr.isatty()
+
+    def update(self, size, failed=False):
+        self.done += 1
+        self.failed += failed
+        self.bytes += size
+        now = time.perf_counter()
+        if not self.quiet and now - self.last_report >= self.interval:
+            self.last_report = now
+            self._report(now)
+
+    def finish(self):
+        if not self.quiet:
+            self._report(time.perf_counter(), final=True)
+
+    def _report(self, now, final=False):
+        elapsed = max(now - self.start, 1e-9)
+        line = (
+            f"{self.done}/{self.total} tenants, {self.done / elapsed:.1f} tenants/s, "
+            f"{self.bytes / 1e6 / elapsed:.2f} MB/s, {self.failed} failed"
+        )
+        if final:
+            line += f" in {elapsed:.2f}s"
+        if self.in_place:
+            sys.stderr.write("\r" + line + ("\n" if final else ""))
+        else:
+            sys.stderr.write(line + "\n")
+        sys.stderr.flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
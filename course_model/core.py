@@ -5,8 +5,25 @@ This module contains the core logic for the course_model package,
 including functions to generate course structures and list available school types.
 """
 
-from .presets import preset_data
-from .utils import _validate_options, _apply_customizations, _format_output
+from collections import OrderedDict
+from time import perf_counter
+
+from .cache import StructureCache
+from .instrumentation import _hooks, _emit, COUNTERS
+from .registry import preset_registry
+from .view import StructureView
+from .utils import (
+    _validate_options, _apply_customizations, _format_output,
+    _canonicalize_options, _copy_output, _count_output_rows, _compile_offerings
+)
+
+# Shared result cache for generate_structure. See configure_cache().
+_structure_cache = StructureCache(maxsize=256)
+preset_registry.add_listener(_structure_cache.invalidate)
+
+# Options that only affect formatting. Specs that differ only in these
+# share a single customized structure in generate_structures().
+_FORMAT_ONLY_OPTIONS = ('integration_metadata', 'output_format', 'path_columns')
 
 
 def generate_structure(school_type='secondary', **options):
@@ -25,9 +42,27 @@ def generate_structure(school_type='secondary', **options):
             level_pattern (str): A pattern for level naming (e.g., "Year {i}").
                                  Must contain '{i}'.
             output_format (str): 'standard' (default) for Python dict/JSON,
-                                 'db_schema' for database schema hints.
+                                 'db_schema' for database schema hints,
+                                 'columnar' for parallel arrays with interned
+                                 lookup tables and shared metadata.
             integration_metadata (dict): Optional dictionary with 'external_id'
                                          and 'lms_tag' to include in output.
+            path_columns (list): db_schema column names for the keys leading to
+                                 each subject list, outermost first. Defaults to
+                                 ['faculty_name', 'department_name'].
+            offerings (bool or list): Adds a 'level_subjects' join table to the
+                                      db_schema output. True uses the preset's
+                                      offering rules; a list of rules replaces them.
+                                      See course_model.offerings.
+            lazy (bool): If True, return a read-only StructureView that customizes
+                         and formats levels, faculties and departments only when
+                         they are accessed. Requires the 'standard' output_format.
+                         Views are not cached; see course_model.view.
+
+    Results are cached per (school_type, options) combination; see configure_cache().
+    Every call returns a fresh copy, so modifying the result never affects the cache.
+    Stage timings and counters are reported to hooks installed through
+    course_model.instrumentation.
 
     Returns:
         dict or list: The generated course structure. Format depends on `output_format`.
@@ -36,33 +71,394 @@ def generate_structure(school_type='secondary', **options):
         ValueError: If an invalid school_type is provided or options are malformed.
         TypeError: If an option has an incorrect type.
     """
-    if school_type not in preset_data:
-        raise ValueError(
-            f"Invalid school_type: '{school_type}'. "
-            f"Available types are: {', '.join(list_school_types())}"
-        )
+    if options.get('lazy'):
+        return _generate_view(school_type, options)
+    options.pop('lazy', None)
+    if _hooks:
+        return _generate_instrumented(school_type, options)
+
+    base_structure = _get_preset(school_type)
+
+    cache_key = _get_cache_key(school_type, options)
+    if cache_key is not None:
+        cached_structure = _structure_cache.get(cache_key)
+        if cached_structure is not None:
+            return _copy_output(cached_structure)
 
     # Validate options before proceeding
     _validate_options(options)
 
-    # Get the base structure from presets
-    base_structure = preset_data[school_type]
-
     # Apply customizations
     customized_structure = _apply_customizations(base_structure, options)
 
     # Format the output and add metadata
     final_structure = _format_output(customized_structure, options)
 
+    return _cache_structure(cache_key, final_structure)
+
+
+def _generate_view(school_type, options):
+    """
+    Returns a lazy StructureView for generate_structure(..., lazy=True).
+    """
+    options = {key: value for key, value in options.items() if key != 'lazy'}
+    base_structure = _get_preset(school_type)
+    _validate_options(options)
+    if options.get('output_format', 'standard') != 'standard':
+        raise ValueError("lazy=True is only supported with the 'standard' output_format.")
+    return StructureView(base_structure, options)
+
+
+def _generate_instrumented(school_type, options):
+    """
+    Same as generate_structure, but times every stage and reports the timings
+    and counters to the installed instrumentation hooks.
+    """
+    call_start = perf_counter()
+    stats = {"stages": {}, "counters": dict.fromkeys(COUNTERS, 0)}
+    stages = stats["stages"]
+
+    base_structure = _get_preset(school_type)
+
+    cache_key = _get_cache_key(school_type, options)
+    if cache_key is not None:
+        cached_structure = _structure_cache.get(cache_key)
+        if cached_structure is not None:
+            final_structure = _copy_output(cached_structure)
+            stats["counters"]["cache_hits"] = 1
+            stages["total"] = perf_counter() - call_start
+            _emit(stages, stats["counters"])
+            return final_structure
+
+    start = perf_counter()
+    _validate_options(options)
+    stages["validation"] = perf_counter() - start
+
+    start = perf_counter()
+    customized_structure = _apply_customizations(base_structure, options, stats=stats)
+    stages["customization"] = perf_counter() - start
+
+    start = perf_counter()
+    final_structure = _format_output(customized_structure, options)
+    stages["format"] = perf_counter() - start
+    stats["counters"]["rows_emitted"] = _count_output_rows(final_structure, options)
+
+    final_structure = _cache_structure(cache_key, final_structure)
+    stages["total"] = perf_counter() - call_start
+    _emit(stages, stats["counters"])
     return final_structure
 
 
+def _get_cache_key(school_type, options):
+    """
+    Helper to build the result cache key, or None if caching is disabled or the
+    options contain unhashable values.
+    """
+    if not _structure_cache.enabled:
+        return None
+    try:
+        return (school_type, _canonicalize_options(options))
+    except (TypeError, RecursionError):
+        return None # Unhashable or extremely deep option values are simply not cached
+
+
+def _cache_structure(cache_key, final_structure):
+    """
+    Helper to store a generated structure in the cache and return the caller's copy.
+    """
+    if cache_key is None:
+        return final_structure
+    _structure_cache.set(cache_key, final_structure)
+    return _copy_output(final_structure)
+
+
 def list_school_types():
     """
     Returns a list of available school types for which presets are defined.
+    This includes presets registered through course_model.registry; they are
+    listed without being loaded.
 
     Returns:
         list: A list of strings representing available school types.
     """
-    return list(preset_data.keys())
+    return preset_registry.names()
+
+
+
+def generate_structures(specs, executor=None, max_workers=None, chunksize=32, ordered=True):
+    """
+    Generates course structures for many (school_type, options) specs in one batch.
+
+    Identical specs are generated only once, and specs that differ only in
+    `integration_metadata` or `output_format` share a single customized
+    structure. Work is split into chunks that can be fanned out across a
+    thread or process pool. All specs are validated before any work starts.
+
+    Args:
+        specs (iterable): (school_type, options) pairs, where options is a dict of
+                          generate_structure options (or None).
+        executor (str or Executor): None to run in the current thread, 'thread' or
+                                    'process' to create a pool, or an existing
+                                    concurrent.futures.Executor to submit to.
+        max_workers (int): Pool size when executor is 'thread' or 'process'.
+        chunksize (int): Approximate number of structures generated per task.
+        ordered (bool): If True (default), structures are yielded in input order.
+                        If False, (index, structure) pairs are yielded as soon as
+                        their chunk completes.
+
+    Yields:
+        dict: Generated structures, or (index, structure) pairs if ordered is False.
+              Duplicate specs receive independent copies.
+
+    Raises:
+        ValueError: If a spec has an invalid school_type, options are malformed,
+                    or the executor or chunksize is invalid.
+        TypeError: If an option has an incorrect type.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer.")
+
+    positions = []     # unique index for every input spec
+    unique_index = {}  # spec key -> unique index
+    groups = OrderedDict() # shared base key -> (school_type, base_options, [(unique index, options)])
+
+    for school_type, options in specs:
+        options = dict(options or {})
+        _get_preset(school_type)
+        _validate_options(options)
+
+        base_options = {k: v for k, v in options.items() if k not in _FORMAT_ONLY_OPTIONS}
+        try:
+            spec_key = (school_type, _canonicalize_options(options))
+            base_key = (school_type, _canonicalize_options(base_options))
+        except (TypeError, RecursionError):
+            # Unhashable or extremely deep option values cannot be deduplicated
+            spec_key = base_key = (None, len(unique_index))
+
+        if spec_key not in unique_index:
+            unique_index[spec_key] = len(unique_index)
+            if base_key not in groups:
+                groups[base_key] = (school_type, base_options, [])
+            groups[base_key][2].append((unique_index[spec_key], options))
+        positions.append(unique_index[spec_key])
+
+    # Pack groups into chunks of roughly `chunksize` structures each
+    chunks = []
+    current_chunk, current_size = [], 0
+    for school_type, base_options, variants in groups.values():
+        current_chunk.append((
+            _get_preset(school_type), base_options,
+            [options for _, options in variants], [index for index, _ in variants]
+        ))
+        current_size += len(variants)
+        if current_size >= chunksize:
+            chunks.append(current_chunk)
+            current_chunk, current_size = [], 0
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    remaining = [0] * len(unique_index)
+    for index in positions:
+        remaining[index] += 1
+
+    def take(results, index):
+        # The last consumer of a deduplicated structure gets the original,
+        # everyone else gets a copy.
+        remaining[index] -= 1
+        if remaining[index]:
+            return _copy_output(results[index])
+        return results.pop(index)
+
+    results = {}
+    chunk_results = _run_chunks(chunks, executor, max_workers, ordered)
+
+    if ordered:
+        for index in positions:
+            while index not in results:
+                chunk, structures = next(chunk_results)
+                for group, group_structures in zip(chunk, structures):
+                    results.update(zip(group[3], group_structures))
+            yield take(results, index)
+    else:
+        spec_positions = [[] for _ in range(len(unique_index))]
+        for position, index in enumerate(positions):
+            spec_positions[index].append(position)
+        for chunk, structures in chunk_results:
+            for group, group_structures in zip(chunk, structures):
+                for index, structure in zip(group[3], group_structures):
+                    results[index] = structure
+                    for position in spec_positions[index]:
+                        yield position, take(results, index)
+
+
+def find_unmatched_exclusions(school_type='secondary', **options):
+    """
+    Reports exclusion rules that do not match anything in the generated structure,
+    e.g. to catch typos in tenant configurations.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        **options: The options that would be passed to generate_structure.
+
+    Returns:
+        dict: The unmatched 'exclude_subjects' and 'exclude_levels' rules.
+
+    Raises:
+        ValueError: If an invalid school_type is provided or options are malformed.
+        TypeError: If an option has an incorrect type.
+    """
+    base_structure = _get_preset(school_type)
+    _validate_options(options)
+
+    matchers = {}
+    _apply_customizations(base_structure, options, matchers)
+    return {
+        key: matchers[key].unmatched_rules() if key in matchers else []
+        for key in ('exclude_subjects', 'exclude_levels')
+    }
+
+
+def generate_offerings(school_type='secondary', **options):
+    """
+    Builds the level x subject offering matrix of a customized structure, e.g.
+    to look up the subjects offered at SS2 or the levels offering Physics.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        **options: The options that would be passed to generate_structure.
+                   Without an offerings option, the preset's offering rules are used.
+
+    Returns:
+        OfferingMatrix: The offerings of the customized levels and subjects.
+
+    Raises:
+        ValueError: If an invalid school_type is provided or options are malformed.
+        TypeError: If an option has an incorrect type.
+    """
+    base_structure = _get_preset(school_type)
+    _validate_options(options)
+    options = dict(options)
+    if options.get('offerings', True) is False:
+        options.pop('offerings')
+    else:
+        options.setdefault('offerings', True)
+    return _compile_offerings(_apply_customizations(base_structure, options))
+
+
+def _get_preset(school_type):
+    """
+    Returns the preset structure for a school type, loading it on first use.
+
+    Raises:
+        ValueError: If no preset exists for the school type.
+    """
+    return preset_registry.get(school_type)
+
+
+def _generate_chunk(chunk):
+    """
+    Generates the structures of one generate_structures() chunk. Each customized
+    base structure is formatted once per variant. Must stay a module-level
+    function so that it can be pickled for process pools.
 
+    Args:
+        chunk (list): (preset_structure, base_options, variant_options, indices) tuples.
+
+    Returns:
+        list: One list of formatted structures per group, in variant order.
+    """
+    structures = []
+    for preset_structure, base_options, variant_options, _ in chunk:
+        customized_structure = _apply_customizations(preset_structure, base_options)
+        structures.append([
+            _format_output(customized_structure, options) for options in variant_options
+        ])
+    return structures
+
+
+def _run_chunks(chunks, executor, max_workers, ordered):
+    """
+    Helper to execute generate_structures() chunks serially or on an executor.
+
+    Yields:
+        tuple: (chunk, structures) pairs, in submission order if ordered is True,
+               otherwise in completion order.
+    """
+    def payload(chunk):
+        # Unique indices are only needed locally, don't ship them to workers
+        return [group[:3] + (None,) for group in chunk]
+
+    if executor is None:
+        for chunk in chunks:
+            yield chunk, _generate_chunk(payload(chunk))
+        return
+
+    # Imported here since concurrent.futures pulls in multiprocessing and
+    # logging, which would slow down every import of the package
+    from concurrent.futures import (
+        Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+    )
+
+    owns_executor = not isinstance(executor, Executor)
+    if executor == 'thread':
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == 'process':
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    elif owns_executor:
+        raise ValueError("executor must be None, 'thread', 'process' or an Executor instance.")
+
+    futures = OrderedDict()
+    try:
+        for chunk in chunks:
+            futures[executor.submit(_generate_chunk, payload(chunk))] = chunk
+        pending = futures if ordered else as_completed(futures)
+        for future in pending:
+            yield futures[future], future.result()
+    finally:
+        # Don't leave queued work behind if the consumer stops early
+        for future in futures:
+            future.cancel()
+        if owns_executor:
+            executor.shutdown(wait=True)
+
+
+def configure_cache(maxsize=None, ttl=None):
+    """
+    Configures the result cache used by generate_structure.
+
+    Args:
+        maxsize (int): Maximum number of cached structures (default 256).
+                       Set to 0 to disable caching entirely.
+        ttl (float): Seconds after which a cached structure expires.
+                     Set to 0 to keep entries until they are evicted.
+
+    Raises:
+        ValueError: If maxsize or ttl is negative.
+    """
+    _structure_cache.configure(maxsize=maxsize, ttl=ttl)
+    if not _structure_cache.enabled:
+        _structure_cache.invalidate()
+
+
+def clear_cache(school_type=None):
+    """
+    Invalidates cached structures, e.g. after modifying preset_data.
+
+    Args:
+        school_type (str): If given, only structures for this school type are removed.
+
+    Returns:
+        int: The number of cache entries removed.
+    """
+    return _structure_cache.invalidate(school_type)
+
+
+def cache_info():
+    """
+    Returns the current cache statistics.
+
+    Returns:
+        dict: Counters for hits, misses and evictions, plus the current size,
+              maxsize and ttl.
+    """
+    return _structure_cache.stats()
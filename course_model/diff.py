@@ -0,0 +1,390 @@
+# course_model/diff.py
+
+"""
+This module computes minimal change sets between two outputs of
+generate_structure and applies them, so that synchronization jobs can send
+only what changed instead of the full catalog.
+
+Both the 'standard' and 'db_schema' output formats are supported. Subjects
+are grouped by their path (the faculty/department keys, or the path columns
+of db_schema rows), and each group is compared entry by entry:
+
+    {
+        "format": "standard",
+        "levels": {"added": [...], "removed": [...], "renamed": [...], "changed": [...]},
+        "subjects": {
+            "added_groups": [{"path": [...], "index": 3, "entries": [...]}],
+            "removed_groups": [[...]],
+            "moved_groups": [{"path": [...], "index": 1}],
+            "added": [{"path": [...], "index": 0, "entry": {...}}],
+            "removed": [{"path": [...], "name": "..."}],
+            "renamed": [{"path": [...], "from": "...", "to": "...", "entry": {...}}],
+            "changed": [{"path": [...], "name": "...", "entry": {...}}]
+        }
+    }
+
+db_schema outputs generated with the offerings option also carry a
+"level_subjects" key, with the join rows that were removed (by position in
+the old table) and added (by position in the new table), or None if the new
+output has no level_subjects table.
+
+Groups present in both structures that changed position are listed in
+moved_groups, with their index among those groups in the new structure, so
+reordered faculties or departments are part of the change set.
+
+A faculty or department that is an empty dictionary is a group of its own,
+with {} as its entries, so empty subtrees survive a round trip.
+
+A removal immediately followed by an addition at the same position is
+reported as a rename. Entries whose name is unchanged but whose other fields
+(e.g. integration metadata or level_order) differ are reported as changed.
+"""
+
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+from .utils import _copy_output, _walk_subjects, _ENTER, _LEAF
+
+_NAME_KEYS = {
+    "standard": ("name", "name"),
+    "db_schema": ("level_name", "subject_name"),
+}
+
+# db_schema subject columns that are not part of the path (see the path_columns option)
+_DB_ENTRY_KEYS = frozenset(("subject_name", "external_id", "lms_tag"))
+
+
+def diff_structures(old, new):
+    """
+    Computes the change set that turns one generated structure into another.
+
+    Args:
+        old (dict): A previous generate_structure output.
+        new (dict): The current generate_structure output, in the same format.
+
+    Returns:
+        dict: The change set, see the module documentation. Paths are lists so
+              that the change set can be serialized as JSON.
+
+    Raises:
+        ValueError: If the structures use different or unsupported output formats.
+    """
+    output_format = _detect_format(old)
+    if _detect_format(new) != output_format:
+        raise ValueError("Cannot diff structures with different output formats.")
+    level_key, subject_key = _NAME_KEYS[output_format]
+    old_levels, old_groups = _split(old, output_format)
+    new_levels, new_groups = _split(new, output_format)
+
+    levels_diff = _diff_entries(old_levels, new_levels, level_key)
+
+    subjects_diff = {
+        "added_groups": [],
+        "removed_groups": [],
+        "moved_groups": [],
+        "added": [],
+        "removed": [],
+        "renamed": [],
+        "changed": []
+    }
+    for path, entries in old_groups.items():
+        if path not in new_groups or not _same_kind(entries, new_groups[path]):
+            subjects_diff["removed_groups"].append(list(path))
+    subjects_diff["moved_groups"] = _moved_groups(old_groups, new_groups)
+    for index, (path, entries) in enumerate(new_groups.items()):
+        if path not in old_groups or not _same_kind(old_groups[path], entries):
+            subjects_diff["added_groups"].append(
+                {"path": list(path), "index": index, "entries": _copy_output(entries)}
+            )
+            continue
+        if isinstance(entries, dict):
+            continue # An empty subtree in both structures
+        group_diff = _diff_entries(old_groups[path], entries, subject_key)
+        for kind, changes in group_diff.items():
+            for change in changes:
+                change["path"] = list(path)
+                subjects_diff[kind].append(change)
+
+    change_set = {"format": output_format, "levels": levels_diff, "subjects": subjects_diff}
+    if output_format == "db_schema" and ("level_subjects" in old or "level_subjects" in new):
+        change_set["level_subjects"] = (
+            _diff_rows(old.get("level_subjects", []), new["level_subjects"])
+            if "level_subjects" in new else None
+        )
+    return change_set
+
+
+def apply_patch(structure, patch):
+    """
+    Applies a change set produced by diff_structures. The input structure is
+    not modified.
+
+    Args:
+        structure (dict): The structure the change set was computed from.
+        patch (dict): The change set.
+
+    Returns:
+        dict: The patched structure.
+
+    Raises:
+        ValueError: If the patch does not match the structure's format, or refers
+                    to entries or groups that do not exist.
+    """
+    output_format = _detect_format(structure)
+    if patch.get("format") != output_format:
+        raise ValueError(
+            f"Patch format '{patch.get('format')}' does not match structure format '{output_format}'."
+        )
+    level_key, subject_key = _NAME_KEYS[output_format]
+    levels, groups = _split(structure, output_format)
+
+    levels = _patch_entries(levels, patch["levels"], level_key, "levels")
+
+    subjects_patch = patch["subjects"]
+    per_group = {}
+    for kind in ("added", "removed", "renamed", "changed"):
+        for change in subjects_patch[kind]:
+            group_patch = per_group.setdefault(tuple(change["path"]), {
+                "added": [], "removed": [], "renamed": [], "changed": []
+            })
+            group_patch[kind].append(change)
+
+    patched_groups = OrderedDict()
+    removed_groups = {tuple(path) for path in subjects_patch["removed_groups"]}
+    for path in removed_groups:
+        if path not in groups:
+            raise ValueError(f"Patch does not apply: subject group {list(path)} not found.")
+    for path, entries in groups.items():
+        if path in removed_groups:
+            continue
+        group_patch = per_group.pop(path, None)
+        if group_patch is not None:
+            entries = _patch_entries(entries, group_patch, subject_key, list(path))
+        patched_groups[path] = entries
+    if per_group:
+        missing_path = next(iter(per_group))
+        raise ValueError(f"Patch does not apply: subject group {list(missing_path)} not found.")
+
+    # Put moved groups back at their position among the kept groups, then
+    # insert new groups at their position in the new structure
+    moved_groups = subjects_patch.get("moved_groups", [])
+    moved_paths = {tuple(moved["path"]) for moved in moved_groups}
+    for path in moved_paths:
+        if path not in patched_groups:
+            raise ValueError(f"Patch does not apply: subject group {list(path)} not found.")
+    items = [(path, entries) for path, entries in patched_groups.items() if path not in moved_paths]
+    for moved in sorted(moved_groups, key=lambda g: g["index"]):
+        path = tuple(moved["path"])
+        items.insert(moved["index"], (path, patched_groups[path]))
+    for added in sorted(subjects_patch["added_groups"], key=lambda g: g["index"]):
+        items.insert(added["index"], (tuple(added["path"]), _copy_output(added["entries"])))
+
+    patched = _join(levels, OrderedDict(items), output_format, structure)
+    if "level_subjects" in patch:
+        if patch["level_subjects"] is None:
+            patched.pop("level_subjects", None)
+        else:
+            patched["level_subjects"] = _patch_rows(
+                structure.get("level_subjects", []), patch["level_subjects"]
+            )
+
+    # Unchanged groups are still shared with the input, so hand out a copy
+    return _copy_output(patched)
+
+
+def is_empty_patch(patch):
+    """
+    Returns True if a change set contains no changes at all.
+    """
+    if "level_subjects" in patch:
+        rows_patch = patch["level_subjects"]
+        if rows_patch is None or any(rows_patch.values()):
+            return False
+    return not any(patch["levels"].values()) and not any(patch["subjects"].values())
+
+
+def _diff_entries(old_entries, new_entries, name_key):
+    """
+    Helper to diff two ordered lists of entries that are identified by name.
+    """
+    diff = {"added": [], "removed": [], "renamed": [], "changed": []}
+    old_names = [entry[name_key] for entry in old_entries]
+    new_names = [entry[name_key] for entry in new_entries]
+
+    matcher = SequenceMatcher(None, old_names, new_names, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for old_entry, new_entry in zip(old_entries[i1:i2], new_entries[j1:j2]):
+                if old_entry != new_entry:
+                    diff["changed"].append(
+                        {"name": new_entry[name_key], "entry": dict(new_entry)}
+                    )
+            continue
+
+        paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+        for offset in range(paired):
+            diff["renamed"].append({
+                "from": old_names[i1 + offset],
+                "to": new_names[j1 + offset],
+                "entry": dict(new_entries[j1 + offset])
+            })
+        for i in range(i1 + paired, i2):
+            diff["removed"].append({"name": old_names[i]})
+        for j in range(j1 + paired, j2):
+            diff["added"].append({"index": j, "entry": dict(new_entries[j])})
+    return diff
+
+
+def _patch_entries(entries, entries_patch, name_key, location):
+    """
+    Helper to apply one list's removals, renames, changes and additions.
+    """
+    positions = {entry[name_key]: i for i, entry in enumerate(entries)}
+    replaced = {}
+
+    def position_of(name):
+        if name not in positions:
+            raise ValueError(f"Patch does not apply: '{name}' not found in {location}.")
+        return positions[name]
+
+    removed = {position_of(change["name"]) for change in entries_patch["removed"]}
+    for change in entries_patch["renamed"]:
+        replaced[position_of(change["from"])] = dict(change["entry"])
+    for change in entries_patch["changed"]:
+        replaced[position_of(change["name"])] = dict(change["entry"])
+
+    patched = [
+        replaced.get(i, entry) for i, entry in enumerate(entries) if i not in removed
+    ]
+    for added in sorted(entries_patch["added"], key=lambda a: a["index"]):
+        patched.insert(added["index"], dict(added["entry"]))
+    return patched
+
+
+def _detect_format(structure):
+    """
+    Helper to tell the supported output formats apart.
+    """
+    if isinstance(structure, dict):
+        if "levels_table" in structure and "subjects_table" in structure:
+            return "db_schema"
+        if isinstance(structure.get("levels"), list) and "subjects" in structure:
+            return "standard"
+    raise ValueError("Only 'standard' and 'db_schema' outputs can be diffed.")
+
+
+def _split(structure, output_format):
+    """
+    Helper to split a structure into its level entries and an ordered mapping
+    of subject path -> subject entries. Empty dictionaries in nested subjects
+    (e.g. a faculty without departments) are groups of their own, mapped to {}.
+    """
+    groups = OrderedDict()
+    if output_format == "db_schema":
+        for row in structure["subjects_table"]:
+            path = tuple(
+                value for key, value in row.items() if key not in _DB_ENTRY_KEYS
+            )
+            groups.setdefault(path, []).append(row)
+        return structure["levels_table"], groups
+
+    subjects = structure["subjects"]
+    if isinstance(subjects, list):
+        groups[()] = subjects
+    elif isinstance(subjects, dict):
+        for event, path, value in _walk_subjects(subjects):
+            if event is _LEAF and isinstance(value, list):
+                groups[path] = value
+            elif event is _ENTER and not value:
+                groups[path] = {}
+    return structure["levels"], groups
+
+
+def _moved_groups(old_groups, new_groups):
+    """
+    Helper to find the groups kept by both structures that changed position.
+    The longest run of groups staying in order is left in place, and every
+    other kept group is reported with its index among the kept groups of the
+    new structure.
+    """
+    old_kept = [
+        path for path, entries in old_groups.items()
+        if path in new_groups and _same_kind(entries, new_groups[path])
+    ]
+    new_kept = [
+        path for path, entries in new_groups.items()
+        if path in old_groups and _same_kind(old_groups[path], entries)
+    ]
+    if old_kept == new_kept:
+        return []
+    in_place = set()
+    matcher = SequenceMatcher(None, old_kept, new_kept, autojunk=False)
+    for block in matcher.get_matching_blocks():
+        in_place.update(new_kept[block.b:block.b + block.size])
+    return [
+        {"path": list(path), "index": index}
+        for index, path in enumerate(new_kept) if path not in in_place
+    ]
+
+
+def _same_kind(old_entries, new_entries):
+    """
+    Helper to tell whether two groups at one path are both subject lists or
+    both empty subtrees.
+    """
+    return isinstance(old_entries, dict) == isinstance(new_entries, dict)
+
+
+def _join(levels, groups, output_format, original):
+    """
+    Helper to rebuild a structure of the original format from levels and groups.
+    """
+    if output_format == "db_schema":
+        patched = dict(original)
+        patched["levels_table"] = levels
+        patched["subjects_table"] = [row for entries in groups.values() for row in entries]
+        return patched
+
+    patched = dict(original)
+    patched["levels"] = levels
+    if () in groups:
+        patched["subjects"] = groups[()]
+    elif groups or isinstance(original["subjects"], dict):
+        subjects = {}
+        for path, entries in groups.items():
+            node = subjects
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = entries
+        patched["subjects"] = subjects
+    return patched
+
+
+def _diff_rows(old_rows, new_rows):
+    """
+    Helper to diff two ordered lists of rows that have no identifying name,
+    such as level_subjects rows.
+    """
+    diff = {"removed": [], "added": []}
+    matcher = SequenceMatcher(
+        None, [tuple(row.items()) for row in old_rows], [tuple(row.items()) for row in new_rows],
+        autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            diff["removed"].extend(range(i1, i2))
+            diff["added"].extend({"index": j, "entry": dict(new_rows[j])} for j in range(j1, j2))
+    return diff
+
+
+def _patch_rows(rows, rows_patch):
+    """
+    Helper to apply a _diff_rows change set.
+    """
+    if any(index >= len(rows) for index in rows_patch["removed"]):
+        raise ValueError("Patch does not apply: level_subjects row not found.")
+    removed = set(rows_patch["removed"])
+    patched = [row for i, row in enumerate(rows) if i not in removed]
+    for added in sorted(rows_patch["added"], key=lambda a: a["index"]):
+        patched.insert(added["index"], dict(added["entry"]))
+    return patched
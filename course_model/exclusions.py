@@ -0,0 +1,242 @@
+# course_model/exclusions.py
+
+"""
+This module compiles exclude_subjects/exclude_levels rules into a matcher
+that tests each name in constant time for exact rules, instead of scanning
+the exclusion list for every subject.
+
+Supported rules:
+    "Drama", "Physics*"              Exact name. Plain strings always match
+                                     literally, whatever characters they contain.
+    {"pattern": "intro", "match": "prefix", "ignore_case": True}
+                                     Explicit rule. match is 'exact' (default),
+                                     'glob' or 'prefix'.
+    {"pattern": "Faculty of Arts/Linguistics/*", "match": "glob"}
+                                     Path-scoped rule. Leading segments must match
+                                     the leading faculty/department path of the
+                                     subject, the last segment matches its name.
+                                     Scope segments may be glob patterns.
+
+Offering rules (see offerings.py) compile with glob_strings=True, which makes
+plain strings glob patterns that may be path-scoped, e.g. "core/*" or "SS*".
+"""
+
+import fnmatch
+import re
+
+_GLOB_CHARACTERS = frozenset("*?[")
+_MATCH_KINDS = ('exact', 'glob', 'prefix')
+_RULE_KEYS = frozenset(('pattern', 'match', 'ignore_case'))
+
+
+def compile_exclusions(rules, allow_paths=True, glob_strings=False):
+    """
+    Compiles a list of exclusion rules into an ExclusionMatcher.
+
+    Args:
+        rules (list): Exclusion rules, see the module documentation.
+        allow_paths (bool): If False, '/' has no special meaning (used for levels).
+        glob_strings (bool): If True, plain strings are glob patterns as well as
+                             exact names (used for offering rules).
+
+    Returns:
+        ExclusionMatcher: The compiled matcher.
+
+    Raises:
+        TypeError: If a rule is not a string or dictionary.
+        ValueError: If a dictionary rule is malformed.
+    """
+    return ExclusionMatcher(rules, allow_paths, glob_strings)
+
+
+def _check_rule(rule):
+    """
+    Validates a single exclusion rule.
+
+    Raises:
+        TypeError: If the rule is not a string or a well-typed dictionary.
+        ValueError: If a dictionary rule has unknown keys or an invalid match kind.
+    """
+    if isinstance(rule, str):
+        return
+    if not isinstance(rule, dict):
+        raise TypeError("Exclusion rules must be strings or dictionaries.")
+    if not isinstance(rule.get('pattern'), str):
+        raise TypeError("Exclusion rule 'pattern' must be a string.")
+    unknown_keys = set(rule) - _RULE_KEYS
+    if unknown_keys:
+        raise ValueError(f"Unknown exclusion rule keys: {', '.join(sorted(unknown_keys))}.")
+    if rule.get('match', 'exact') not in _MATCH_KINDS:
+        raise ValueError("Exclusion rule 'match' must be 'exact', 'glob' or 'prefix'.")
+
+
+class ExclusionMatcher:
+    """
+    A compiled set of exclusion rules.
+
+    Exact rules are looked up in hash tables. Unscoped glob and prefix rules are
+    combined into a single regular expression, and path-scoped rules are only
+    evaluated for subject lists whose path matches their scope. The matcher
+    remembers which rules matched, see unmatched_rules().
+    """
+
+    def __init__(self, rules, allow_paths=True, glob_strings=False):
+        self.rules = list(rules)
+        self._matched = set()
+        self._exact = {}          # name -> rule indices
+        self._exact_casefold = {} # casefolded name -> rule indices
+        self._patterns = []       # (rule index, compiled regex) for unscoped rules
+        self._scoped = []         # (rule index, scope regexes, name regex)
+        self._scope_cache = {}
+        self.visited = 0          # Number of names tested so far
+
+        for index, rule in enumerate(self.rules):
+            _check_rule(rule)
+            if isinstance(rule, str):
+                # Plain strings always match literally, for backwards compatibility
+                self._exact.setdefault(rule, []).append(index)
+                if not glob_strings or not (
+                    _GLOB_CHARACTERS & set(rule) or (allow_paths and '/' in rule)
+                ):
+                    continue
+                pattern, kind, ignore_case = rule, 'glob', False
+            else:
+                pattern = rule['pattern']
+                kind = rule.get('match', 'exact')
+                ignore_case = bool(rule.get('ignore_case', False))
+
+            segments = pattern.split('/') if allow_paths else [pattern]
+            if len(segments) > 1:
+                scope = tuple(_compile_segment(s, kind, ignore_case, is_name=False)
+                              for s in segments[:-1])
+                name_regex = _compile_segment(segments[-1], kind, ignore_case, is_name=True)
+                self._scoped.append((index, scope, name_regex))
+            elif kind == 'exact' and ignore_case:
+                self._exact_casefold.setdefault(pattern.casefold(), []).append(index)
+            elif kind == 'exact':
+                self._exact.setdefault(pattern, []).append(index)
+            else:
+                self._patterns.append(
+                    (index, _compile_segment(pattern, kind, ignore_case, is_name=True))
+                )
+
+        self._combined_pattern = None
+        if self._patterns:
+            self._combined_pattern = re.compile(
+                "|".join(f"(?:{regex.pattern})" for _, regex in self._patterns)
+            )
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    @property
+    def has_scoped_rules(self):
+        return bool(self._scoped)
+
+    def matches(self, name, path=()):
+        """
+        Checks whether a name is excluded and records the matching rules.
+
+        Args:
+            name (str): The subject or level name.
+            path (tuple): The faculty/department keys leading to the subject.
+
+        Returns:
+            bool: True if at least one rule matches.
+        """
+        self.visited += 1
+        return self._match(name, self._scoped_rules_for(path) if self._scoped else ())
+
+    def filter(self, names, path=()):
+        """
+        Removes excluded names from a list.
+
+        Returns:
+            list: The filtered list, or names itself if nothing was excluded.
+        """
+        scoped_rules = self._scoped_rules_for(path) if self._scoped else ()
+        self.visited += len(names)
+        if not scoped_rules and not self._exact_casefold and self._combined_pattern is None:
+            # Only exact rules apply: a plain membership test per name
+            exact = self._exact
+            kept = [name for name in names if name not in exact]
+            if len(kept) == len(names):
+                return names
+            for name in names:
+                indices = exact.get(name)
+                if indices:
+                    self._matched.update(indices)
+            return kept
+        match = self._match
+        kept = [name for name in names if not match(name, scoped_rules)]
+        return names if len(kept) == len(names) else kept
+
+    def unmatched_rules(self):
+        """
+        Returns the rules that have not matched any name so far.
+
+        Returns:
+            list: The original rule values, in the order they were given.
+        """
+        return [rule for index, rule in enumerate(self.rules) if index not in self._matched]
+
+    def _match(self, name, scoped_rules):
+        matched = False
+        indices = self._exact.get(name)
+        if indices:
+            self._matched.update(indices)
+            matched = True
+
+        if not isinstance(name, str):
+            return matched
+
+        if self._exact_casefold:
+            indices = self._exact_casefold.get(name.casefold())
+            if indices:
+                self._matched.update(indices)
+                matched = True
+
+        if self._combined_pattern is not None and self._combined_pattern.match(name):
+            # Only identify the individual rules once the combined pattern hits
+            for index, regex in self._patterns:
+                if regex.match(name):
+                    self._matched.add(index)
+            matched = True
+
+        for index, name_regex in scoped_rules:
+            if name_regex.match(name):
+                self._matched.add(index)
+                matched = True
+        return matched
+
+    def _scoped_rules_for(self, path):
+        """
+        Returns the (rule index, name regex) pairs whose scope matches the start of path.
+        """
+        scoped_rules = self._scope_cache.get(path)
+        if scoped_rules is None:
+            scoped_rules = []
+            for index, scope, name_regex in self._scoped:
+                if len(scope) <= len(path) and all(
+                    isinstance(key, str) and regex.match(key) for regex, key in zip(scope, path)
+                ):
+                    scoped_rules.append((index, name_regex))
+            self._scope_cache[path] = scoped_rules
+        return scoped_rules
+
+
+def _compile_segment(pattern, kind, ignore_case, is_name):
+    """
+    Helper to compile one rule segment into an anchored regular expression.
+    Scope segments of exact or prefix rules are matched exactly, or as globs
+    if they contain glob characters.
+    """
+    if kind == 'prefix' and is_name:
+        regex = re.escape(pattern)
+    elif kind == 'glob' or (not is_name and _GLOB_CHARACTERS & set(pattern)):
+        regex = fnmatch.translate(pattern)
+    else:
+        regex = re.escape(pattern) + r"\Z"
+    if ignore_case:
+        regex = f"(?i:{regex})"
+    return re.compile(regex)
@@ -0,0 +1,193 @@
+# course_model/export.py
+
+"""
+This module provides streaming exports of the db_schema output format.
+Rows are produced lazily by generators and written to CSV or JSON Lines
+files in chunks, so large catalogs can be exported in constant memory.
+"""
+
+import csv
+import io
+import json
+import os
+from contextlib import contextmanager
+
+from .core import _get_preset
+from .utils import (
+    _validate_options, _apply_customizations, _iter_db_schema_rows, _subjects_columns,
+    _level_subjects_columns, DEFAULT_PATH_COLUMNS, LEVELS_COLUMNS, SUBJECTS_COLUMNS,
+    LEVEL_SUBJECTS_COLUMNS
+)
+
+TABLE_COLUMNS = {
+    "levels_table": LEVELS_COLUMNS,
+    "subjects_table": SUBJECTS_COLUMNS,
+    "level_subjects": LEVEL_SUBJECTS_COLUMNS
+}
+
+
+def iter_db_rows(school_type='secondary', as_tuples=False, **options):
+    """
+    Lazily generates the rows of the db_schema output format.
+
+    Accepts the same options as generate_structure; `output_format` is ignored.
+    Results are not cached, since rows are streamed rather than stored.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        as_tuples (bool): If True, rows are tuples ordered like TABLE_COLUMNS[table],
+                          or like table_columns(path_columns) for custom path columns.
+        **options: Customization options, see generate_structure.
+
+    Yields:
+        tuple: (table, row) pairs where table is 'levels_table', 'subjects_table'
+               or, with the offerings option, 'level_subjects'. Levels come first,
+               then subjects, then level_subjects rows.
+
+    Raises:
+        ValueError: If an invalid school_type is provided or options are malformed.
+        TypeError: If an option has an incorrect type.
+    """
+    base_structure = _get_preset(school_type)
+    _validate_options(options)
+
+    customized_structure = _apply_customizations(base_structure, options)
+    yield from _iter_db_schema_rows(
+        customized_structure, options.get('integration_metadata', {}), as_tuples,
+        options.get('path_columns', DEFAULT_PATH_COLUMNS)
+    )
+
+
+def table_columns(path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Returns the columns of each db_schema table for a path column schema.
+
+    Args:
+        path_columns (list): The path_columns option used to generate the rows.
+
+    Returns:
+        dict: Table name -> tuple of column names, like TABLE_COLUMNS.
+    """
+    return {
+        "levels_table": LEVELS_COLUMNS,
+        "subjects_table": _subjects_columns(path_columns),
+        "level_subjects": _level_subjects_columns(path_columns)
+    }
+
+
+def write_csv(rows, levels_file, subjects_file, chunk_size=1000,
+              path_columns=DEFAULT_PATH_COLUMNS, level_subjects_file=None):
+    """
+    Writes tagged db_schema rows into one CSV file per table.
+
+    Args:
+        rows (iterable): (table, row) pairs, e.g. from iter_db_rows(). Rows may be
+                         dictionaries or tuples.
+        levels_file (str or file): Path or text file object for the levels table.
+        subjects_file (str or file): Path or text file object for the subjects table.
+        chunk_size (int): Number of rows buffered per table before writing.
+        path_columns (list): The path_columns option used to generate the rows.
+        level_subjects_file (str or file): Path or text file object for the
+                                           level_subjects table, required if the
+                                           rows were generated with offerings.
+
+    Returns:
+        dict: The number of rows written per table.
+
+    Raises:
+        ValueError: If a row belongs to an unknown table (or to level_subjects
+                    without a level_subjects_file), or chunk_size is invalid.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    columns = table_columns(path_columns)
+    if level_subjects_file is None:
+        del columns["level_subjects"]
+    counts = {table: 0 for table in columns}
+    with _open_sink(levels_file) as levels_fp, _open_sink(subjects_file) as subjects_fp, \
+            _open_sink(level_subjects_file) as level_subjects_fp:
+        writers = {
+            "levels_table": csv.writer(levels_fp),
+            "subjects_table": csv.writer(subjects_fp)
+        }
+        if level_subjects_fp is not None:
+            writers["level_subjects"] = csv.writer(level_subjects_fp)
+        buffers = {table: [] for table in columns}
+        for table, header in columns.items():
+            writers[table].writerow(header)
+
+        for table, row in rows:
+            buffer = buffers.get(table)
+            if buffer is None:
+                if table == "level_subjects":
+                    raise ValueError("level_subjects rows require a level_subjects_file.")
+                raise ValueError(f"Unknown table: '{table}'.")
+            if isinstance(row, dict):
+                row = tuple(row.get(column, '') for column in columns[table])
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                writers[table].writerows(buffer)
+                counts[table] += len(buffer)
+                buffer.clear()
+
+        for table, buffer in buffers.items():
+            writers[table].writerows(buffer)
+            counts[table] += len(buffer)
+
+    return counts
+
+
+def write_jsonl(rows, file, chunk_size=1000, path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Writes tagged db_schema rows as JSON Lines, one {"table": ..., "row": {...}}
+    object per line.
+
+    Args:
+        rows (iterable): (table, row) pairs, e.g. from iter_db_rows(). Tuple rows
+                         are converted to dictionaries using table_columns(path_columns).
+        file (str or file): Path or text file object to write to.
+        chunk_size (int): Number of lines buffered before writing.
+        path_columns (list): The path_columns option used to generate the rows.
+
+    Returns:
+        dict: The number of rows written per table.
+
+    Raises:
+        ValueError: If a row belongs to an unknown table or chunk_size is invalid.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    columns = table_columns(path_columns)
+    counts = {table: 0 for table in columns}
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    with _open_sink(file) as fp:
+        lines = []
+        for table, row in rows:
+            if table not in counts:
+                raise ValueError(f"Unknown table: '{table}'.")
+            if not isinstance(row, dict):
+                row = dict(zip(columns[table], row))
+            lines.append(encoder.encode({"table": table, "row": row}))
+            counts[table] += 1
+            if len(lines) >= chunk_size:
+                fp.write("\n".join(lines) + "\n")
+                lines.clear()
+        if lines:
+            fp.write("\n".join(lines) + "\n")
+
+    return counts
+
+
+@contextmanager
+def _open_sink(target):
+    """
+    Helper to open a path for writing, or pass an already open file object
+    (or None) through. Only files opened here are closed afterwards.
+    """
+    if isinstance(target, (str, bytes, os.PathLike)):
+        with io.open(target, "w", encoding="utf-8", newline="") as fp:
+            yield fp
+    else:
+        yield target
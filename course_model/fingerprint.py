@@ -0,0 +1,213 @@
+# course_model/fingerprint.py
+
+"""
+This module computes Merkle-style content fingerprints for generated
+structures. Every subject list, department, faculty and the structure as a
+whole gets a stable hash, so change detection can compare a single hash per
+level and only descend into subtrees that differ.
+
+Fingerprints are derived from the customized structure (including its
+offering rules) together with the output_format, integration_metadata and
+path_columns options, which fully determine the formatted output. They are
+stable across processes and Python versions.
+
+Fingerprint trees look like:
+
+    {
+        "hash": "...",            # Whole structure
+        "levels": "...",          # Level list
+        "subjects": {
+            "hash": "...",
+            "children": {
+                "Faculty of Arts": {
+                    "hash": "...",
+                    "children": {"Linguistics": {"hash": "..."}, ...}
+                },
+                ...
+            }
+        }
+    }
+"""
+
+import hashlib
+import json
+
+from .core import _get_preset, _cache_structure, _get_cache_key, _structure_cache
+from .utils import (
+    _validate_options, _apply_customizations, _format_output, _copy_output,
+    _walk_subjects, _ENTER, _LEAF, DEFAULT_PATH_COLUMNS
+)
+
+_DIGEST_SIZE = 16
+
+
+def generate_structure_with_fingerprints(school_type='secondary', **options):
+    """
+    Generates a structure and its fingerprints, sharing the customization work.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        **options: Customization options, see generate_structure.
+
+    Returns:
+        tuple: (structure, fingerprints). The structure is identical to the
+               result of generate_structure(school_type, **options).
+
+    Raises:
+        ValueError: If an invalid school_type is provided or options are malformed.
+        TypeError: If an option has an incorrect type.
+    """
+    base_structure = _get_preset(school_type)
+    _validate_options(options)
+
+    customized_structure = _apply_customizations(base_structure, options)
+    fingerprints = _fingerprint_customized(customized_structure, options)
+
+    cache_key = _get_cache_key(school_type, options)
+    cached_structure = _structure_cache.get(cache_key) if cache_key is not None else None
+    if cached_structure is not None:
+        return _copy_output(cached_structure), fingerprints
+    final_structure = _format_output(customized_structure, options)
+    return _cache_structure(cache_key, final_structure), fingerprints
+
+
+def structure_fingerprints(school_type='secondary', **options):
+    """
+    Computes the fingerprints of a structure without formatting it.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        **options: Customization options, see generate_structure.
+
+    Returns:
+        dict: The fingerprint tree, see the module documentation.
+
+    Raises:
+        ValueError: If an invalid school_type is provided or options are malformed.
+        TypeError: If an option has an incorrect type.
+    """
+    base_structure = _get_preset(school_type)
+    _validate_options(options)
+    return _fingerprint_customized(_apply_customizations(base_structure, options), options)
+
+
+def changed_subject_paths(old_fingerprints, new_fingerprints):
+    """
+    Compares two fingerprint trees, descending only into subtrees whose hashes differ.
+
+    Args:
+        old_fingerprints (dict): A previous fingerprint tree.
+        new_fingerprints (dict): The current fingerprint tree.
+
+    Returns:
+        list: Paths (lists of keys) of the subject lists and subtrees that were
+              added, removed or changed. Empty if the subjects are identical.
+    """
+    changed = []
+    stack = [((), old_fingerprints["subjects"], new_fingerprints["subjects"])]
+    while stack:
+        path, old_node, new_node = stack.pop()
+        if old_node is not None and new_node is not None and old_node["hash"] == new_node["hash"]:
+            continue
+        old_children = old_node.get("children") if old_node is not None else None
+        new_children = new_node.get("children") if new_node is not None else None
+        if old_children is None or new_children is None:
+            # A subject list, or a subtree that was added, removed or changed type
+            changed.append(list(path))
+            continue
+        for key in reversed(list(dict.fromkeys(list(old_children) + list(new_children)))):
+            stack.append((path + (key,), old_children.get(key), new_children.get(key)))
+    return changed
+
+
+def _fingerprint_customized(structure, options):
+    """
+    Computes the fingerprint tree of a customized structure in a single
+    iterative post-order walk.
+
+    Args:
+        structure (dict): The processed course structure.
+        options (dict): Options including output_format, integration_metadata
+                        and path_columns.
+
+    Returns:
+        dict: The fingerprint tree.
+    """
+    # Everything that affects how names are rendered is folded into every hash.
+    # Metadata keys keep their order, which is the order of the entry fields.
+    output_format = options.get('output_format', 'standard')
+    salt_values = [
+        output_format, json.dumps(options.get('integration_metadata', {}), default=str)
+    ]
+    if output_format == 'db_schema':
+        # Only db_schema rows carry path columns
+        salt_values += list(options.get('path_columns', DEFAULT_PATH_COLUMNS))
+    salt = _hash_values("salt", salt_values)
+    if "offerings" in structure:
+        # The level_subjects table depends on the resolved offering rules and
+        # on the level names they are matched against
+        salt = _hash_values("offerings" + salt, [
+            structure["offerings"], structure.get("level_names", structure["levels"])
+        ])
+
+    levels_hash = _hash_values("levels" + salt, structure["levels"])
+
+    subjects = structure["subjects"]
+    if isinstance(subjects, dict):
+        subjects_node = _fingerprint_tree(subjects, salt)
+    elif isinstance(subjects, list):
+        subjects_node = {"hash": _hash_values("list" + salt, subjects)}
+    else:
+        subjects_node = {"hash": _hash_values("none" + salt, [])}
+
+    return {
+        "hash": _hash_values("structure", [levels_hash, subjects_node["hash"]]),
+        "levels": levels_hash,
+        "subjects": subjects_node
+    }
+
+
+def _fingerprint_tree(subjects_dict, salt):
+    """
+    Helper to hash a nested subject dictionary bottom-up without recursion.
+    """
+    root = {"children": {}}
+    stack = [root]
+    for event, path, value in _walk_subjects(subjects_dict):
+        if event is _ENTER:
+            child = {"children": {}}
+            stack[-1]["children"][path[-1]] = child
+            stack.append(child)
+        elif event is _LEAF:
+            if isinstance(value, list):
+                stack[-1]["children"][path[-1]] = {"hash": _hash_values("list" + salt, value)}
+        else:
+            _seal_node(stack.pop(), salt)
+    _seal_node(root, salt)
+    return root
+
+
+def _seal_node(node, salt):
+    """
+    Helper to hash a dictionary node once all of its children are hashed.
+    """
+    children = node.pop("children")
+    node["hash"] = _hash_values("dict" + salt, [
+        part for key, child in children.items() for part in (key, child["hash"])
+    ])
+    node["children"] = children
+
+
+def _hash_values(tag, values):
+    """
+    Helper to hash a tag and an ordered sequence of values unambiguously.
+    """
+    digest = hashlib.blake2b(tag.encode("utf-8"), digest_size=_DIGEST_SIZE)
+    for value in values:
+        if isinstance(value, str):
+            encoded = b"s" + value.encode("utf-8")
+        else:
+            encoded = b"j" + json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
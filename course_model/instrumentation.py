@@ -0,0 +1,190 @@
+# course_model/instrumentation.py
+
+"""
+This module provides opt-in instrumentation for generate_structure.
+
+Hooks receive per-stage timings ('validation', 'customization', 'merge',
+'filter', 'format' and 'total') and per-call counters ('subjects_visited',
+'rows_emitted', 'dedup_operations', 'cache_hits'). While no hooks are
+installed, generate_structure only pays for a single truthiness check.
+
+Example:
+    from course_model.instrumentation import instrument
+
+    with instrument() as stats:
+        generate_structure("university")
+    print(stats.snapshot())
+"""
+
+import threading
+from contextlib import contextmanager
+
+STAGES = ('validation', 'customization', 'merge', 'filter', 'format', 'total')
+COUNTERS = ('subjects_visited', 'rows_emitted', 'dedup_operations', 'cache_hits')
+
+# Installed hooks. Empty means instrumentation is disabled. This list is
+# imported by other modules, so it must only ever be modified in place.
+_hooks = []
+_hooks_lock = threading.Lock()
+
+
+class InstrumentationHooks:
+    """
+    Base class for instrumentation hooks. Override the methods you need.
+    Hooks are called synchronously from the thread running generate_structure.
+    """
+
+    def on_stage(self, stage, seconds):
+        """
+        Called when a pipeline stage finishes.
+
+        Args:
+            stage (str): One of STAGES.
+            seconds (float): Wall-clock duration of the stage.
+        """
+
+    def on_count(self, name, value):
+        """
+        Called once per generate_structure call for each counter.
+
+        Args:
+            name (str): One of COUNTERS.
+            value (int): The counter value for the call.
+        """
+
+
+class StageStats(InstrumentationHooks):
+    """
+    Hooks that aggregate timings and counters across calls. Thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all aggregated timings and counters.
+        """
+        with self._lock:
+            self._stages = {}
+            self._counters = dict.fromkeys(COUNTERS, 0)
+
+    def on_stage(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                self._stages[stage] = [1, seconds, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = min(entry[2], seconds)
+                entry[3] = max(entry[3], seconds)
+
+    def on_count(self, name, value):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        Returns the aggregated statistics.
+
+        Returns:
+            dict: {'stages': {stage: {'calls', 'total', 'mean', 'min', 'max'}},
+                   'counters': {name: total}}. Times are in seconds.
+        """
+        with self._lock:
+            stages = {
+                stage: {
+                    "calls": calls,
+                    "total": total,
+                    "mean": total / calls,
+                    "min": minimum,
+                    "max": maximum
+                }
+                for stage, (calls, total, minimum, maximum) in self._stages.items()
+            }
+            return {"stages": stages, "counters": dict(self._counters)}
+
+
+def add_hooks(hooks):
+    """
+    Installs hooks process-wide, for every thread.
+    """
+    with _hooks_lock:
+        _hooks.append(hooks)
+
+
+def remove_hooks(hooks):
+    """
+    Removes previously installed hooks. Unknown hooks are ignored.
+    """
+    with _hooks_lock:
+        if hooks in _hooks:
+            _hooks.remove(hooks)
+
+
+@contextmanager
+def instrument(hooks=None):
+    """
+    Installs hooks for the duration of a with block.
+
+    Args:
+        hooks (InstrumentationHooks): The hooks to install. Defaults to a new StageStats.
+
+    Yields:
+        InstrumentationHooks: The installed hooks.
+    """
+    if hooks is None:
+        hooks = StageStats()
+    add_hooks(hooks)
+    try:
+        yield hooks
+    finally:
+        remove_hooks(hooks)
+
+
+# Process-wide aggregate, installed by enable_stats()
+_process_stats = StageStats()
+
+
+def enable_stats():
+    """
+    Starts aggregating statistics for every generate_structure call in the process.
+    """
+    with _hooks_lock:
+        if _process_stats not in _hooks:
+            _hooks.append(_process_stats)
+
+
+def disable_stats():
+    """
+    Stops aggregating process-wide statistics. Collected values are kept.
+    """
+    remove_hooks(_process_stats)
+
+
+def get_stats():
+    """
+    Returns the process-wide statistics collected since enable_stats().
+    See StageStats.snapshot().
+    """
+    return _process_stats.snapshot()
+
+
+def reset_stats():
+    """
+    Clears the process-wide statistics.
+    """
+    _process_stats.reset()
+
+
+def _emit(stages, counters):
+    """
+    Helper to deliver the timings and counters of one call to every installed hook.
+    """
+    for hooks in list(_hooks):
+        for stage, seconds in stages.items():
+            hooks.on_stage(stage, seconds)
+        for name, value in counters.items():
+            hooks.on_count(name, value)
@@ -0,0 +1,341 @@
+# course_model/loader.py
+
+"""
+This module bulk loads db_schema output into SQLite using the standard
+library sqlite3 module. It generates matching CREATE TABLE / CREATE INDEX
+statements and inserts rows in batches inside a single savepoint, so a
+failed load leaves the database as it was. Generated SQL quotes every table
+and column name, so path columns named after SQL keywords (e.g. 'group')
+are valid.
+"""
+
+import re
+import sqlite3
+import time
+
+from .utils import LEVELS_COLUMNS, DEFAULT_PATH_COLUMNS, _subjects_columns, _level_subjects_columns
+
+# Columns used to identify existing rows when upserting.
+LEVELS_CONFLICT_COLUMNS = ("external_id", "level_order")
+# These two are followed by the path columns, see the path_columns option.
+SUBJECTS_CONFLICT_COLUMNS = ("external_id", "subject_name")
+LEVEL_SUBJECTS_CONFLICT_COLUMNS = ("external_id", "level_name", "subject_name")
+
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Savepoint wrapping each load_sqlite call
+_SAVEPOINT = "course_model_load"
+
+# ON CONFLICT ... DO UPDATE was added in SQLite 3.24
+_SUPPORTS_UPSERT_CLAUSE = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+
+def create_schema_sql(levels_table='levels', subjects_table='subjects', upsert=False,
+                      path_columns=DEFAULT_PATH_COLUMNS, level_subjects_table=None):
+    """
+    Generates DDL statements for tables matching the db_schema output format.
+
+    Args:
+        levels_table (str): Name of the levels table.
+        subjects_table (str): Name of the subjects table.
+        upsert (bool): If True, unique indexes on LEVELS_CONFLICT_COLUMNS and on
+                       SUBJECTS_CONFLICT_COLUMNS plus the path columns are created
+                       so rows can be upserted.
+        path_columns (list): The path_columns option used to generate the rows.
+                             One TEXT column is created per entry and the path
+                             columns are indexed together.
+        level_subjects_table (str): If given, the level_subjects join table (see the
+                                    offerings option) is created under this name,
+                                    indexed by level and by subject. With upsert,
+                                    LEVEL_SUBJECTS_CONFLICT_COLUMNS and the path
+                                    columns are unique.
+
+    Returns:
+        list: SQL statements, safe to run repeatedly.
+
+    Raises:
+        ValueError: If a table or column name is not a valid SQL identifier.
+    """
+    _check_identifier(levels_table)
+    _check_identifier(subjects_table)
+    for column in path_columns:
+        _check_identifier(column, "column")
+    index_kind = "UNIQUE INDEX" if upsert else "INDEX"
+    path_definitions = "".join(
+        f"{_quote(column)} TEXT NOT NULL DEFAULT '', " for column in path_columns
+    )
+    subjects_conflict_columns = SUBJECTS_CONFLICT_COLUMNS + tuple(path_columns)
+
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {_quote(levels_table)} ("
+        "id INTEGER PRIMARY KEY, "
+        "level_name TEXT NOT NULL, "
+        "level_order INTEGER NOT NULL, "
+        "external_id TEXT NOT NULL DEFAULT '', "
+        "lms_tag TEXT NOT NULL DEFAULT '')",
+        f"CREATE {index_kind} IF NOT EXISTS idx_{levels_table}_external_id_level_order "
+        f"ON {_quote(levels_table)} (external_id, level_order)",
+        f"CREATE TABLE IF NOT EXISTS {_quote(subjects_table)} ("
+        "id INTEGER PRIMARY KEY, "
+        "subject_name TEXT NOT NULL, "
+        f"{path_definitions}"
+        "external_id TEXT NOT NULL DEFAULT '', "
+        "lms_tag TEXT NOT NULL DEFAULT '')",
+        f"CREATE {index_kind} IF NOT EXISTS idx_{subjects_table}_external_id_subject_name "
+        f"ON {_quote(subjects_table)} ({_column_list(subjects_conflict_columns)})",
+        f"CREATE INDEX IF NOT EXISTS idx_{subjects_table}_{_path_index_suffix(path_columns)} "
+        f"ON {_quote(subjects_table)} ({_column_list(path_columns)})"
+    ]
+    if level_subjects_table is not None:
+        statements += _level_subjects_schema_sql(level_subjects_table, upsert, path_columns)
+    return statements
+
+
+def load_sqlite(connection, rows, levels_table='levels', subjects_table='subjects',
+                upsert=False, batch_size=1000, create_tables=True,
+                path_columns=DEFAULT_PATH_COLUMNS, level_subjects_table='level_subjects'):
+    """
+    Bulk loads db_schema rows into SQLite inside a single savepoint.
+
+    If the connection has no transaction open, the rows are committed before
+    returning. If the caller already has a transaction open, the rows are
+    loaded into it and left for the caller to commit; on failure only this
+    load is rolled back and the caller's earlier changes are kept.
+
+    Args:
+        connection (sqlite3.Connection or str): An open connection, or a database
+                                                path that is opened and closed here.
+        rows (dict or iterable): A db_schema output from generate_structure, or
+                                 (table, row) pairs such as those yielded by
+                                 course_model.export.iter_db_rows().
+        levels_table (str): Name of the levels table.
+        subjects_table (str): Name of the subjects table.
+        upsert (bool): If True, existing rows with the same conflict columns are
+                       updated instead of duplicated. See create_schema_sql().
+                       Conflict indexes left non-unique by an earlier load
+                       without upsert are rebuilt as unique indexes.
+        batch_size (int): Number of rows passed to each executemany call.
+        create_tables (bool): If True, tables and indexes are created if missing.
+        path_columns (list): The path_columns option used to generate the rows.
+        level_subjects_table (str): Name of the level_subjects join table. It is only
+                                    created once the first level_subjects row
+                                    arrives, see the offerings option.
+
+    Returns:
+        dict: Rows loaded per table ('levels', 'subjects', 'level_subjects'), the
+              total 'rows', elapsed 'seconds' and 'rows_per_second'.
+
+    Raises:
+        ValueError: If a row belongs to an unknown table, batch_size is invalid,
+                    or a table or column name is not a valid SQL identifier.
+        sqlite3.Error: If the database rejects the data. The savepoint is
+                       rolled back and nothing is loaded.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer.")
+    _check_identifier(levels_table)
+    _check_identifier(subjects_table)
+    _check_identifier(level_subjects_table)
+    for column in path_columns:
+        _check_identifier(column, "column")
+
+    if isinstance(connection, str):
+        owned_connection = sqlite3.connect(connection)
+        try:
+            return load_sqlite(
+                owned_connection, rows, levels_table, subjects_table,
+                upsert, batch_size, create_tables, path_columns, level_subjects_table
+            )
+        finally:
+            owned_connection.close()
+
+    if isinstance(rows, dict):
+        rows = _iter_tagged_rows(rows)
+
+    subjects_columns = _subjects_columns(path_columns)
+    level_subjects_columns = _level_subjects_columns(path_columns)
+    statements = {
+        "levels_table": _insert_sql(
+            levels_table, LEVELS_COLUMNS, LEVELS_CONFLICT_COLUMNS if upsert else None
+        ),
+        "subjects_table": _insert_sql(
+            subjects_table, subjects_columns,
+            SUBJECTS_CONFLICT_COLUMNS + tuple(path_columns) if upsert else None
+        ),
+        "level_subjects": _insert_sql(
+            level_subjects_table, level_subjects_columns,
+            LEVEL_SUBJECTS_CONFLICT_COLUMNS + tuple(path_columns) if upsert else None
+        )
+    }
+    columns = {
+        "levels_table": LEVELS_COLUMNS,
+        "subjects_table": subjects_columns,
+        "level_subjects": level_subjects_columns
+    }
+    batches = {"levels_table": [], "subjects_table": [], "level_subjects": []}
+    counts = {"levels_table": 0, "subjects_table": 0, "level_subjects": 0}
+    create_level_subjects = create_tables
+
+    start = time.perf_counter()
+    cursor = connection.cursor()
+    # A savepoint nests inside a transaction the caller may have open, and
+    # starts (and on release commits) one otherwise
+    cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+    try:
+        if create_tables:
+            if upsert:
+                _drop_stale_index(cursor, levels_table,
+                                  f"idx_{levels_table}_external_id_level_order",
+                                  LEVELS_CONFLICT_COLUMNS)
+                _drop_stale_index(cursor, subjects_table,
+                                  f"idx_{subjects_table}_external_id_subject_name",
+                                  SUBJECTS_CONFLICT_COLUMNS + tuple(path_columns))
+            for statement in create_schema_sql(levels_table, subjects_table, upsert, path_columns):
+                cursor.execute(statement)
+
+        for table, row in rows:
+            batch = batches.get(table)
+            if batch is None:
+                raise ValueError(f"Unknown table: '{table}'.")
+            if table == "level_subjects" and create_level_subjects:
+                # Only schemas generated with offerings get the join table
+                if upsert:
+                    _drop_stale_index(cursor, level_subjects_table,
+                                      f"idx_{level_subjects_table}_external_id_level_name",
+                                      LEVEL_SUBJECTS_CONFLICT_COLUMNS + tuple(path_columns))
+                for statement in _level_subjects_schema_sql(
+                        level_subjects_table, upsert, path_columns):
+                    cursor.execute(statement)
+                create_level_subjects = False
+            if isinstance(row, dict):
+                row = tuple(row.get(column, '') for column in columns[table])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(statements[table], batch)
+                counts[table] += len(batch)
+                batch.clear()
+
+        for table, batch in batches.items():
+            if batch:
+                cursor.executemany(statements[table], batch)
+                counts[table] += len(batch)
+        cursor.execute(f"RELEASE {_SAVEPOINT}")
+    except BaseException:
+        if connection.in_transaction:
+            cursor.execute(f"ROLLBACK TO {_SAVEPOINT}")
+            cursor.execute(f"RELEASE {_SAVEPOINT}")
+        raise
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    return {
+        "levels": counts["levels_table"],
+        "subjects": counts["subjects_table"],
+        "level_subjects": counts["level_subjects"],
+        "rows": total,
+        "seconds": elapsed,
+        "rows_per_second": total / elapsed if elapsed > 0 else float(total)
+    }
+
+
+def _level_subjects_schema_sql(table, upsert, path_columns):
+    """
+    Helper to generate the DDL statements of the level_subjects join table.
+    """
+    _check_identifier(table)
+    index_kind = "UNIQUE INDEX" if upsert else "INDEX"
+    path_definitions = "".join(
+        f"{_quote(column)} TEXT NOT NULL DEFAULT '', " for column in path_columns
+    )
+    conflict_columns = LEVEL_SUBJECTS_CONFLICT_COLUMNS + tuple(path_columns)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {_quote(table)} ("
+        "id INTEGER PRIMARY KEY, "
+        "level_name TEXT NOT NULL, "
+        "subject_name TEXT NOT NULL, "
+        f"{path_definitions}"
+        "external_id TEXT NOT NULL DEFAULT '', "
+        "lms_tag TEXT NOT NULL DEFAULT '')",
+        f"CREATE {index_kind} IF NOT EXISTS idx_{table}_external_id_level_name "
+        f"ON {_quote(table)} ({_column_list(conflict_columns)})",
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_external_id_subject_name "
+        f"ON {_quote(table)} (external_id, subject_name)"
+    ]
+
+
+def _drop_stale_index(cursor, table, index, columns):
+    """
+    Helper to drop a conflict index that is not unique or covers other columns,
+    e.g. one created by a load without upsert, so that it is created again as
+    the unique index ON CONFLICT needs.
+    """
+    for _, name, unique, *_ in cursor.execute(f"PRAGMA index_list({_quote(table)})").fetchall():
+        if name != index:
+            continue
+        indexed = [row[2] for row in cursor.execute(f"PRAGMA index_info({_quote(name)})")]
+        if not unique or indexed != list(columns):
+            cursor.execute(f"DROP INDEX {_quote(name)}")
+
+
+def _iter_tagged_rows(db_schema_output):
+    """
+    Helper to turn a db_schema output dictionary into (table, row) pairs.
+    """
+    for table in ("levels_table", "subjects_table", "level_subjects"):
+        for row in db_schema_output.get(table, []):
+            yield table, row
+
+
+def _insert_sql(table, columns, conflict_columns=None):
+    """
+    Helper to build a parameterized INSERT statement, optionally as an upsert.
+    """
+    table = _quote(table)
+    column_list = _column_list(columns)
+    placeholders = ", ".join("?" for _ in columns)
+    if conflict_columns is None:
+        return f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
+    if not _SUPPORTS_UPSERT_CLAUSE:
+        return f"INSERT OR REPLACE INTO {table} ({column_list}) VALUES ({placeholders})"
+
+    updates = ", ".join(
+        f"{_quote(column)} = excluded.{_quote(column)}"
+        for column in columns if column not in conflict_columns
+    )
+    return (
+        f"INSERT INTO {table} ({column_list}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({_column_list(conflict_columns)}) DO UPDATE SET {updates}"
+    )
+
+
+def _path_index_suffix(path_columns):
+    """
+    Helper to name the path column index, e.g. 'faculty_department' for the defaults.
+    """
+    return "_".join(
+        column[:-len("_name")] if column.endswith("_name") else column for column in path_columns
+    )
+
+
+def _quote(name):
+    """
+    Helper to quote a checked identifier, so SQL keywords can be used as names.
+    """
+    return f'"{name}"'
+
+
+def _column_list(columns):
+    """
+    Helper to format quoted column names as a comma separated list.
+    """
+    return ", ".join(_quote(column) for column in columns)
+
+
+def _check_identifier(name, kind="table"):
+    """
+    Helper to reject table and column names that are not plain SQL identifiers.
+    """
+    if not isinstance(name, str) or not _IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"Invalid {kind} name: '{name}'.")
@@ -0,0 +1,236 @@
+# course_model/offerings.py
+
+"""
+This module records which subjects are offered at which levels, e.g. that
+the senior_secondary_science subjects are only taught in SS1-SS3.
+
+Offerings are declared as rules pairing subject rules with level rules, using
+the same rule syntax as exclude_subjects and exclude_levels (see exclusions.py),
+except that plain strings are also glob patterns and may be path-scoped:
+
+    [
+        {"subjects": ["core/*", "electives/*"], "levels": ["*"]},
+        {"subjects": ["senior_secondary_*/*"], "levels": ["SS*"]},
+        {"subjects": ["Further Mathematics"], "levels": ["SS2", "SS3"]}
+    ]
+
+Presets may define default rules under an "offerings" key. Level rules match
+the preset's level names and custom_levels as they were before level_pattern
+renamed them, so "SS*" keeps matching the senior secondary levels under any
+naming pattern. The rules are compiled into an OfferingMatrix over interned
+level and subject IDs: every
+level is an integer bitset of the subjects it offers, and every subject an
+integer bitset of the levels offering it, so both directions are answered
+without scanning the catalog.
+"""
+
+from .exclusions import compile_exclusions, _check_rule
+
+_RULE_FIELDS = ('subjects', 'levels')
+
+
+def _check_offerings(offerings):
+    """
+    Validates the offerings option, or the offering rules of a preset.
+
+    Raises:
+        TypeError: If offerings is neither a boolean nor a list of rule dictionaries,
+                   or a subject or level rule is malformed.
+        ValueError: If an offering rule has missing or unknown keys.
+    """
+    if isinstance(offerings, bool):
+        return
+    if not isinstance(offerings, list):
+        raise TypeError("offerings must be True, False or a list of offering rules.")
+    for rule in offerings:
+        if not isinstance(rule, dict):
+            raise TypeError("Offering rules must be dictionaries.")
+        if set(rule) != set(_RULE_FIELDS):
+            raise ValueError("Offering rules must have exactly the keys 'subjects' and 'levels'.")
+        for field in _RULE_FIELDS:
+            if not isinstance(rule[field], list):
+                raise TypeError(f"Offering rule '{field}' must be a list.")
+            for item in rule[field]:
+                _check_rule(item)
+
+
+class OfferingMatrix:
+    """
+    A sparse level x subject matrix stored as integer bitsets.
+
+    Levels are identified by their name and position, subjects by their path
+    (the faculty/department keys leading to their subject list) and name, so a
+    subject name appearing in several departments is tracked separately per
+    department. Queries by name alone cover every path the name appears under.
+    """
+
+    def __init__(self, levels, subject_lists, rules=(), level_names=None):
+        """
+        Args:
+            levels (list): Level names, in order.
+            subject_lists (iterable): (path, subject names) pairs, where path is a
+                                      tuple of keys (empty for flat subject lists).
+            rules (list): Offering rules, see the module documentation.
+            level_names (list): Optional names the level rules are matched against,
+                                one per level (e.g. the names before level_pattern
+                                was applied). Defaults to levels.
+        """
+        self.levels = list(levels)
+        self._rule_level_names = list(level_names) if level_names is not None else self.levels
+        self.subjects = []          # subject id -> (path, name)
+        self._level_ids = {}        # level name -> level id
+        self._subject_ids = {}      # (path, name) -> subject id
+        self._name_ids = {}         # name -> list of subject ids
+        for level_id, level in enumerate(self.levels):
+            self._level_ids.setdefault(level, level_id)
+        subject_lists = [(tuple(path), names) for path, names in subject_lists]
+        for path, names in subject_lists:
+            for name in names:
+                if (path, name) not in self._subject_ids:
+                    subject_id = self._subject_ids[(path, name)] = len(self.subjects)
+                    self.subjects.append((path, name))
+                    self._name_ids.setdefault(name, []).append(subject_id)
+
+        self._subject_bits = [0] * len(self.subjects) # subject id -> bitset of level ids
+        for rule in rules:
+            self._add_rule(rule, subject_lists)
+
+        # Transpose into level id -> bitset of subject ids. Setting bits in a
+        # bytearray keeps this linear; shifting into a growing int would not be.
+        level_bytes = [bytearray(len(self.subjects) // 8 + 1) for _ in self.levels]
+        for subject_id, level_bits in enumerate(self._subject_bits):
+            for level_id in _iter_bits(level_bits):
+                level_bytes[level_id][subject_id >> 3] |= 1 << (subject_id & 7)
+        self._level_bits = [int.from_bytes(row, "little") for row in level_bytes]
+
+    def __len__(self):
+        """
+        Returns the number of offered (level, subject) pairs.
+        """
+        return sum(bin(bits).count("1") for bits in self._level_bits)
+
+    def __repr__(self):
+        return (f"<OfferingMatrix {len(self.levels)} levels x {len(self.subjects)} subjects, "
+                f"{len(self)} offered>")
+
+    def subjects_at(self, level, with_paths=False):
+        """
+        Returns the subjects offered at a level.
+
+        Args:
+            level (str): The level name.
+            with_paths (bool): If True, return (path, name) tuples instead of names.
+
+        Returns:
+            list: Subject names in catalog order, each listed once, or (path, name)
+                  tuples. Empty if the level does not exist.
+        """
+        level_id = self._level_ids.get(level)
+        if level_id is None:
+            return []
+        subjects = [self.subjects[subject_id] for subject_id in _iter_bits(self._level_bits[level_id])]
+        if with_paths:
+            return subjects
+        return list(dict.fromkeys(name for _, name in subjects))
+
+    def levels_offering(self, subject, path=None):
+        """
+        Returns the levels offering a subject.
+
+        Args:
+            subject (str): The subject name.
+            path (tuple): Optional keys leading to the subject's list. If omitted,
+                          levels offering the name under any path are returned.
+
+        Returns:
+            list: Level names in level order. Empty if the subject does not exist.
+        """
+        bits = 0
+        for subject_id in self._ids_for(subject, path):
+            bits |= self._subject_bits[subject_id]
+        return [self.levels[level_id] for level_id in _iter_bits(bits)]
+
+    def is_offered(self, level, subject, path=None):
+        """
+        Returns whether a subject (under any path, unless one is given) is offered at a level.
+        """
+        level_id = self._level_ids.get(level)
+        if level_id is None:
+            return False
+        return any(
+            self._subject_bits[subject_id] >> level_id & 1
+            for subject_id in self._ids_for(subject, path)
+        )
+
+    def iter_pairs(self):
+        """
+        Yields every offered pair in level order, then catalog order.
+
+        Yields:
+            tuple: (level, path, subject) triples.
+        """
+        for level_id, bits in enumerate(self._level_bits):
+            level = self.levels[level_id]
+            for subject_id in _iter_bits(bits):
+                path, name = self.subjects[subject_id]
+                yield level, path, name
+
+    def to_index_arrays(self):
+        """
+        Exports the matrix in compressed sparse row form, for compact storage
+        or transfer.
+
+        Returns:
+            dict: 'levels' and 'subjects' ([path list, name] pairs) lookup tables,
+                  plus 'offsets' and 'subject_ids': the subject ids offered at
+                  level i are subject_ids[offsets[i]:offsets[i + 1]].
+        """
+        offsets, subject_ids = [0], []
+        for bits in self._level_bits:
+            subject_ids.extend(_iter_bits(bits))
+            offsets.append(len(subject_ids))
+        return {
+            "levels": list(self.levels),
+            "subjects": [[list(path), name] for path, name in self.subjects],
+            "offsets": offsets,
+            "subject_ids": subject_ids
+        }
+
+    def _add_rule(self, rule, subject_lists):
+        """
+        Helper to set the bits of every subject and level matched by a rule.
+        """
+        level_matcher = compile_exclusions(rule["levels"], allow_paths=False, glob_strings=True)
+        level_bits = 0
+        for level_id, level in enumerate(self._rule_level_names):
+            if level_matcher.matches(level):
+                level_bits |= 1 << level_id
+        if not level_bits:
+            return
+
+        subject_matcher = compile_exclusions(rule["subjects"], glob_strings=True)
+        subject_ids = self._subject_ids
+        for path, names in subject_lists:
+            # filter() keeps unmatched names and has a fast path for exact rules
+            unmatched = set(subject_matcher.filter(names, path))
+            for name in names:
+                if name not in unmatched:
+                    self._subject_bits[subject_ids[(path, name)]] |= level_bits
+
+    def _ids_for(self, subject, path):
+        if path is None:
+            return self._name_ids.get(subject, ())
+        subject_id = self._subject_ids.get((tuple(path), subject))
+        return () if subject_id is None else (subject_id,)
+
+
+def _iter_bits(bits):
+    """
+    Helper to yield the positions of the set bits of an integer, lowest first,
+    in time linear in the size of the integer.
+    """
+    digits = bin(bits)[:1:-1] # Least significant bit first
+    position = digits.find("1")
+    while position != -1:
+        yield position
+        position = digits.find("1", position + 1)
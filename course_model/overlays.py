@@ -0,0 +1,240 @@
+# course_model/overlays.py
+
+"""
+This module resolves stacked customization layers on top of a preset, e.g.
+national preset -> state -> district -> school. Each layer holds its own
+custom_subjects/exclude_subjects/custom_levels/exclude_levels/level_pattern
+options and is applied to the resolved result of its parent.
+
+Resolved layers are cached, so generating a school only applies the school's
+own layer once its district is resolved. Editing a layer invalidates exactly
+that layer and the layers beneath it.
+
+Example:
+    from course_model.overlays import OverlayTree
+
+    tree = OverlayTree("secondary")
+    tree.set_layer("lagos", custom_subjects={"electives": ["Yoruba Literature"]})
+    tree.set_layer("ikeja", parent="lagos", exclude_subjects=["Hausa Language"])
+    tree.set_layer("school-42", parent="ikeja", custom_levels=["SS4"])
+    structure = tree.generate("school-42", output_format="db_schema")
+"""
+
+import threading
+
+from .core import _get_preset
+from .utils import (
+    _validate_options, _apply_customizations, _format_output, _copy_output, _resolve_offerings
+)
+
+# Options a layer may define. Formatting options are given per generate() call.
+LAYER_OPTIONS = ('custom_subjects', 'exclude_subjects', 'custom_levels', 'exclude_levels',
+                 'level_pattern')
+
+
+class OverlayTree:
+    """
+    A tree of named customization layers over one school type's preset.
+    Layers without a parent are applied directly to the preset. Thread-safe.
+    """
+
+    def __init__(self, school_type='secondary'):
+        """
+        Args:
+            school_type (str): The school type whose preset is the root of the tree.
+        """
+        self.school_type = school_type
+        self._lock = threading.RLock()
+        self._layers = {}      # name -> (parent, options)
+        self._children = {}    # name -> set of child names
+        self._resolved = {}    # name -> resolved structure
+        self._preset = None    # The preset the cached layers were resolved from
+        self._stats = {"resolutions": 0, "hits": 0, "invalidations": 0}
+
+    def set_layer(self, name, parent=None, **options):
+        """
+        Adds or replaces a layer. Replacing a layer invalidates it and every
+        layer beneath it.
+
+        Args:
+            name (str): The layer name, unique within the tree.
+            parent (str): The parent layer, or None to apply the layer to the preset.
+            **options: Customization options, see LAYER_OPTIONS and generate_structure.
+
+        Raises:
+            ValueError: If the parent does not exist, the layer would become its
+                        own ancestor, or options are malformed or not layer options.
+            TypeError: If name is not a string or an option has an incorrect type.
+        """
+        if not isinstance(name, str):
+            raise TypeError("Layer name must be a string.")
+        unsupported = [key for key in options if key not in LAYER_OPTIONS]
+        if unsupported:
+            raise ValueError(
+                f"Unsupported layer options: {', '.join(unsupported)}. "
+                f"Layers accept: {', '.join(LAYER_OPTIONS)}."
+            )
+        _validate_options(options)
+        options = _copy_output(options) # Later changes by the caller must not leak in
+
+        with self._lock:
+            if parent is not None:
+                if parent not in self._layers:
+                    raise ValueError(f"Unknown parent layer: '{parent}'.")
+                if name in self.lineage(parent):
+                    raise ValueError(f"Layer '{name}' cannot be its own ancestor.")
+            if name in self._layers:
+                self.invalidate(name)
+                self._children[self._layers[name][0]].discard(name)
+            self._layers[name] = (parent, options)
+            self._children.setdefault(parent, set()).add(name)
+            self._children.setdefault(name, set())
+
+    def remove_layer(self, name):
+        """
+        Removes a layer that has no children.
+
+        Raises:
+            ValueError: If the layer does not exist or still has children.
+        """
+        with self._lock:
+            if name not in self._layers:
+                raise ValueError(f"Unknown layer: '{name}'.")
+            if self._children.get(name):
+                raise ValueError(
+                    f"Layer '{name}' still has children: {', '.join(sorted(self._children[name]))}."
+                )
+            parent = self._layers.pop(name)[0]
+            self._children[parent].discard(name)
+            del self._children[name]
+            self._resolved.pop(name, None)
+
+    def layers(self):
+        """
+        Returns every layer name as {name: parent}.
+        """
+        with self._lock:
+            return {name: parent for name, (parent, _) in self._layers.items()}
+
+    def lineage(self, name):
+        """
+        Returns the layer names from the top-most ancestor down to `name`.
+
+        Raises:
+            ValueError: If the layer does not exist.
+        """
+        with self._lock:
+            if name not in self._layers:
+                raise ValueError(f"Unknown layer: '{name}'.")
+            chain = []
+            while name is not None:
+                chain.append(name)
+                name = self._layers[name][0]
+            chain.reverse()
+            return chain
+
+    def invalidate(self, name=None):
+        """
+        Drops the cached resolution of a layer and every layer beneath it,
+        or of all layers if name is None.
+
+        Returns:
+            int: The number of cached layers dropped.
+        """
+        with self._lock:
+            if name is None:
+                dropped = len(self._resolved)
+                self._resolved.clear()
+            else:
+                dropped = 0
+                pending = [name]
+                while pending:
+                    current = pending.pop()
+                    if self._resolved.pop(current, None) is not None:
+                        dropped += 1
+                    pending.extend(self._children.get(current, ()))
+            self._stats["invalidations"] += dropped
+            return dropped
+
+    def precompute(self, names=None):
+        """
+        Resolves layers ahead of time, e.g. after loading every layer at startup.
+
+        Args:
+            names (list): Layers to resolve. Defaults to every layer.
+        """
+        with self._lock:
+            for name in (names if names is not None else list(self._layers)):
+                self._resolve(name)
+
+    def generate(self, name, **options):
+        """
+        Generates the structure of a layer.
+
+        Args:
+            name (str): The layer to generate.
+            **options: Formatting options (output_format, integration_metadata,
+                       path_columns, offerings). Customization options are applied on top
+                       of the resolved layer without being cached.
+
+        Returns:
+            dict: The generated structure, like generate_structure() output.
+
+        Raises:
+            ValueError: If the layer does not exist or options are malformed.
+            TypeError: If an option has an incorrect type.
+        """
+        _validate_options(options)
+        with self._lock:
+            structure = self._resolve(name)
+        if any(key in options for key in LAYER_OPTIONS):
+            structure = _apply_customizations(structure, options)
+        if options.get('offerings', False) is not False:
+            # Resolved layers don't carry the preset's offering rules
+            structure = dict(structure, offerings=_resolve_offerings(
+                _get_preset(self.school_type), options['offerings']
+            ))
+        # Formatting builds new levels and subject lists, so nothing cached is shared
+        return _format_output(structure, options)
+
+    def cache_info(self):
+        """
+        Returns counters for resolved layers.
+
+        Returns:
+            dict: 'resolutions' (layers customized), 'hits' (lookups that reused a
+                  cached layer or ancestor),
+                  'invalidations' (cached layers dropped), 'layers' and 'cached'.
+        """
+        with self._lock:
+            info = dict(self._stats)
+            info["layers"] = len(self._layers)
+            info["cached"] = len(self._resolved)
+            return info
+
+    def _resolve(self, name):
+        """
+        Returns the resolved structure of a layer, resolving uncached ancestors
+        first. The result is shared and must be treated as read-only.
+        """
+        preset = _get_preset(self.school_type)
+        if preset is not self._preset:
+            # The preset was replaced or reloaded, so every layer is stale
+            self.invalidate()
+            self._preset = preset
+
+        chain = self.lineage(name)
+        start = len(chain)
+        while start > 0 and chain[start - 1] not in self._resolved:
+            start -= 1
+        if start > 0:
+            self._stats["hits"] += 1
+        if start == len(chain):
+            return self._resolved[name]
+
+        structure = self._resolved[chain[start - 1]] if start > 0 else preset
+        for layer in chain[start:]:
+            structure = _apply_customizations(structure, self._layers[layer][1])
+            self._resolved[layer] = structure
+            self._stats["resolutions"] += 1
+        return structure
@@ -17,6 +17,9 @@ preset_data = {
             "Civic Education",
             "Creative Arts",
             "Physical and Health Education"
+        ],
+        "offerings": [
+            {"subjects": ["*"], "levels": ["*"]}
         ]
     },
     "secondary": {
@@ -61,7 +64,11 @@ preset_data = {
                 "Commerce",
                 "Office Practice"
             ]
-        }
+        },
+        "offerings": [
+            {"subjects": ["core/*", "electives/*"], "levels": ["*"]},
+            {"subjects": ["senior_secondary_*/*"], "levels": ["SS*"]}
+        ]
     },
     "university": {
         "levels": ["Year 1", "Year 2", "Year 3", "Year 4"],
@@ -152,7 +159,10 @@ preset_data = {
                     "Demography"
                 ]
             }
-        }
+        },
+        # The preset does not record the year each course is taught in, so
+        # there are no default offering rules yet; pass explicit rules instead
+        "offerings": []
     }
     # Add more school types as needed
 }
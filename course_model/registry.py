@@ -0,0 +1,372 @@
+# course_model/registry.py
+
+"""
+This module provides the preset registry used by generate_structure and
+list_school_types. Besides the built-in presets in presets.py, school types
+can be registered from JSON files, directories of JSON files, Python
+callables, or the 'course_model.presets' entry point group of installed
+packages. Presets are only loaded when a school type is first used, and
+file-backed presets are reloaded when the file changes on disk.
+
+A preset file contains one school type, e.g. presets/vocational.json:
+
+    {"levels": ["Level 1", "Level 2"], "subjects": {"Trades": ["Welding"]}}
+
+Directories listed in the COURSE_MODEL_PRESET_PATH environment variable
+(separated by os.pathsep) are registered automatically.
+"""
+
+import json
+import os
+import threading
+import time
+
+from .presets import preset_data
+
+ENTRY_POINT_GROUP = 'course_model.presets'
+PRESET_PATH_ENV = 'COURSE_MODEL_PRESET_PATH'
+
+
+class PresetRegistry:
+    """
+    Resolves school types to preset structures, loading them on first use.
+
+    Explicitly registered presets take precedence over the built-in preset_data
+    dictionary. Discovered presets (entry points and COURSE_MODEL_PRESET_PATH
+    files) can only add new school types, so resolving a built-in school type
+    never has to scan installed packages.
+    """
+
+    def __init__(self, builtin_presets=None, reload_interval=1.0, discover=True):
+        """
+        Args:
+            builtin_presets (dict): Presets that are always available. The dictionary
+                                    is used directly, so later changes are visible.
+            reload_interval (float): Minimum number of seconds between checks of a
+                                     preset file's modification time. 0 checks on every use.
+            discover (bool): If True, entry points and COURSE_MODEL_PRESET_PATH
+                             directories are discovered on first use.
+        """
+        self._lock = threading.RLock()
+        self._builtin = builtin_presets if builtin_presets is not None else {}
+        self._sources = {}
+        self._entry_points = {}
+        self._discovered = not discover
+        self._listeners = []
+        self.reload_interval = reload_interval
+
+    def register(self, school_type, preset):
+        """
+        Registers a preset structure, or a callable returning one, for a school type.
+        Callables are invoked once, the first time the school type is used.
+
+        Raises:
+            TypeError: If school_type is not a string or preset is neither a dict
+                       nor callable.
+        """
+        if not isinstance(school_type, str):
+            raise TypeError("school_type must be a string.")
+        if isinstance(preset, dict):
+            _check_preset(school_type, preset)
+            source = _LoadedSource(preset)
+        elif callable(preset):
+            source = _CallableSource(preset)
+        else:
+            raise TypeError("preset must be a dictionary or a callable returning one.")
+        self._set_source(school_type, source)
+
+    def register_file(self, path, school_type=None):
+        """
+        Registers a JSON preset file. The file is parsed on first use and again
+        whenever its modification time or size changes.
+
+        Args:
+            path (str): Path to the JSON file.
+            school_type (str): The school type name. Defaults to the file name
+                               without its extension.
+
+        Returns:
+            str: The registered school type.
+        """
+        path = os.path.abspath(os.fspath(path))
+        if school_type is None:
+            school_type = os.path.splitext(os.path.basename(path))[0]
+        self._set_source(school_type, _FileSource(path, self))
+        return school_type
+
+    def register_directory(self, path):
+        """
+        Registers every *.json file in a directory, named after the file.
+        Files are listed now but only parsed on first use.
+
+        Returns:
+            list: The registered school types.
+        """
+        registered = []
+        for file_name in sorted(os.listdir(path)):
+            if file_name.endswith('.json'):
+                registered.append(self.register_file(os.path.join(path, file_name)))
+        return registered
+
+    def unregister(self, school_type):
+        """
+        Removes a registered preset. Built-in presets and entry points are not affected.
+        """
+        with self._lock:
+            removed = self._sources.pop(school_type, None)
+        if removed is not None:
+            self._notify(school_type)
+
+    def add_listener(self, callback):
+        """
+        Adds a callback(school_type) invoked whenever a preset is registered,
+        removed or reloaded, e.g. to invalidate caches.
+        """
+        self._listeners.append(callback)
+
+    def get(self, school_type):
+        """
+        Returns the preset structure for a school type, loading it if necessary.
+
+        Raises:
+            ValueError: If no preset exists for the school type, or a preset file
+                        is malformed.
+        """
+        source = self._sources.get(school_type)
+        if source is None:
+            if school_type in self._builtin:
+                return self._builtin[school_type]
+            self._discover()
+            source = self._sources.get(school_type) or self._entry_points.get(school_type)
+            if source is None:
+                raise ValueError(
+                    f"Invalid school_type: '{school_type}'. "
+                    f"Available types are: {', '.join(self.names())}"
+                )
+        return source.load(school_type)
+
+    def names(self):
+        """
+        Returns every available school type without loading any preset.
+
+        Returns:
+            list: Built-in school types first, followed by entry points and
+                  registered school types in registration order.
+        """
+        self._discover()
+        names = dict.fromkeys(self._builtin)
+        names.update(dict.fromkeys(self._entry_points))
+        names.update(dict.fromkeys(self._sources))
+        return list(names)
+
+    def refresh(self):
+        """
+        Forgets every loaded preset and re-discovers entry points and
+        COURSE_MODEL_PRESET_PATH directories on next use.
+        """
+        with self._lock:
+            for source in list(self._sources.values()) + list(self._entry_points.values()):
+                source.reset()
+            self._discovered = False
+        self._notify(None)
+
+    def _set_source(self, school_type, source):
+        with self._lock:
+            self._sources[school_type] = source
+        self._notify(school_type)
+
+    def _notify(self, school_type):
+        for callback in self._listeners:
+            callback(school_type)
+
+    def _discover(self):
+        if self._discovered:
+            return
+        with self._lock:
+            if self._discovered:
+                return
+            for entry_point in _iter_entry_points(ENTRY_POINT_GROUP):
+                if entry_point.name in self._builtin:
+                    continue
+                self._entry_points.setdefault(entry_point.name, _EntryPointSource(entry_point))
+            for directory in os.environ.get(PRESET_PATH_ENV, '').split(os.pathsep):
+                if directory and os.path.isdir(directory):
+                    for file_name in sorted(os.listdir(directory)):
+                        school_type, extension = os.path.splitext(file_name)
+                        if (extension == '.json' and school_type not in self._sources
+                                and school_type not in self._builtin):
+                            self._sources[school_type] = _FileSource(
+                                os.path.abspath(os.path.join(directory, file_name)), self
+                            )
+            self._discovered = True
+
+
+class _LoadedSource:
+    """
+    A preset that is already in memory.
+    """
+
+    def __init__(self, preset):
+        self.preset = preset
+
+    def load(self, school_type):
+        return self.preset
+
+    def reset(self):
+        pass
+
+
+class _CallableSource:
+    """
+    A preset produced by a callable on first use.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.preset = None
+        self._lock = threading.Lock()
+
+    def load(self, school_type):
+        if self.preset is None:
+            with self._lock:
+                if self.preset is None:
+                    self.preset = _check_preset(school_type, self.loader())
+        return self.preset
+
+    def reset(self):
+        self.preset = None
+
+
+class _EntryPointSource(_CallableSource):
+    """
+    A preset provided by an installed package. The entry point may refer to a
+    preset dictionary, a callable returning one, or a path to a JSON file.
+    """
+
+    def __init__(self, entry_point):
+        super().__init__(lambda: _resolve_entry_point(entry_point))
+
+
+class _FileSource:
+    """
+    A preset stored in a JSON file, cached until the file's mtime or size changes.
+    """
+
+    def __init__(self, path, registry):
+        self.path = path
+        self.registry = registry
+        self.preset = None
+        self.signature = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, school_type):
+        now = time.monotonic()
+        if self.preset is not None and now - self.checked_at < self.registry.reload_interval:
+            return self.preset
+
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError as error:
+                raise ValueError(f"Cannot read preset file '{self.path}': {error}") from None
+            signature = (stat.st_mtime_ns, stat.st_size)
+            reloaded = False
+            if self.preset is None or signature != self.signature:
+                reloaded = self.preset is not None
+                self.preset = _check_preset(school_type, _read_json(self.path))
+                self.signature = signature
+            self.checked_at = now
+            preset = self.preset
+
+        if reloaded:
+            self.registry._notify(school_type)
+        return preset
+
+    def reset(self):
+        self.preset = None
+        self.signature = None
+
+
+def _read_json(path):
+    """
+    Helper to parse a preset file, reporting malformed JSON as a ValueError.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Malformed preset file '{path}': {error}") from None
+
+
+def _resolve_entry_point(entry_point):
+    """
+    Helper to turn an entry point's target into a preset dictionary.
+    """
+    target = entry_point.load()
+    if callable(target):
+        target = target()
+    if isinstance(target, (str, os.PathLike)):
+        target = _read_json(target)
+    return target
+
+
+def _check_preset(school_type, preset):
+    """
+    Validates the shape of a preset structure.
+
+    Raises:
+        ValueError: If the preset is not a dictionary with a 'levels' list and
+                    'subjects' list or dictionary.
+    """
+    if (not isinstance(preset, dict)
+            or not isinstance(preset.get("levels", []), list)
+            or not isinstance(preset.get("subjects", []), (list, dict))):
+        raise ValueError(
+            f"Invalid preset for school_type '{school_type}': expected a dictionary "
+            "with a 'levels' list and a 'subjects' list or dictionary."
+        )
+    return preset
+
+
+def _iter_entry_points(group):
+    """
+    Helper to list the entry points of a group across Python versions.
+    Returns nothing when importlib.metadata is unavailable (Python 3.7).
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, 'select'):
+        return list(all_entry_points.select(group=group))
+    return list(all_entry_points.get(group, []))
+
+
+# The registry used by generate_structure and list_school_types
+preset_registry = PresetRegistry(preset_data)
+
+
+def register_preset(school_type, preset):
+    """
+    Registers a preset structure or loader callable with the default registry.
+    See PresetRegistry.register().
+    """
+    preset_registry.register(school_type, preset)
+
+
+def register_preset_file(path, school_type=None):
+    """
+    Registers a JSON preset file with the default registry.
+    See PresetRegistry.register_file().
+    """
+    return preset_registry.register_file(path, school_type)
+
+
+def register_preset_directory(path):
+    """
+    Registers every JSON preset file in a directory with the default registry.
+    See PresetRegistry.register_directory().
+    """
+    return preset_registry.register_directory(path)
@@ -0,0 +1,414 @@
+# course_model/search.py
+
+"""
+This module provides an in-memory search index over subject names, for
+autocomplete and course pickers. Subjects are indexed from presets,
+generated structures or custom_subjects payloads, and every hit carries its
+full path (school type, faculty, department, ...).
+
+Two kinds of queries are supported:
+
+    * Prefix matching on a sorted array of normalized names and word suffixes,
+      so "phys" finds both "Physics" and "Applied Physics".
+    * Fuzzy matching on character trigrams, ranked by Dice similarity, so
+      "phisycs" still finds "Physics".
+
+Example:
+    from course_model.search import build_index
+
+    index = build_index()
+    index.add_subjects("university", {"Faculty of Arts": {"Linguistics": ["Phonetics"]}})
+    index.search("phon")
+    # [{'name': 'Phonetics', 'path': ['university', 'Faculty of Arts', 'Linguistics'], 'score': 1.0}]
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from heapq import heappush, heapreplace
+from itertools import chain
+from math import ceil
+
+from .registry import preset_registry
+from .utils import _walk_subjects, _LEAF
+
+_GRAM_SIZE = 3
+# Up to this many new keys are inserted one by one instead of re-sorting
+_INSERT_LIMIT = 64
+# Fuzzy queries first read their rarest posting lists up to about this many
+# entries in total, and only read further lists if their hits so far leave
+# room for names found there
+_FUZZY_POSTING_BUDGET = 20000
+
+
+class SubjectIndex:
+    """
+    A prefix and trigram index over subject names. Subjects can be added
+    incrementally; only the new names are indexed.
+
+    Distinct names are indexed once, however many paths they appear under.
+    Reads and writes are serialized by a lock, so an index can be shared
+    between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._name_ids = {}         # normalized name -> name id
+        self._names = []            # name id -> display name
+        self._normalized = []       # name id -> normalized name
+        self._paths = []            # name id -> list of paths (tuples)
+        self._gram_counts = []      # name id -> number of distinct trigrams
+        self._name_keys = []        # sorted (normalized name, name id)
+        self._word_keys = []        # sorted (normalized suffix starting at a later word, name id)
+        self._postings = {}         # trigram -> list of name ids
+        self._known_paths = set()   # (name id, path) pairs already indexed
+        self._removed_types = set() # school types whose paths are hidden until compacted
+
+    def __len__(self):
+        """
+        Returns the number of indexed (subject, path) pairs.
+        """
+        return len(self._known_paths)
+
+    def add_subjects(self, school_type, subjects, path=()):
+        """
+        Indexes a subject list or nested subject dictionary, e.g. a preset's
+        subjects or a custom_subjects option. Subjects already indexed under the
+        same path are skipped, so merged customizations can be added as they arrive.
+
+        Args:
+            school_type (str): The school type the subjects belong to.
+            subjects (list or dict): Subject names, or standard-format entries with
+                                     a 'name' key, as a list or nested dictionary.
+            path (tuple): Keys leading to `subjects` below the school type.
+
+        Returns:
+            int: The number of (subject, path) pairs added.
+
+        Raises:
+            TypeError: If school_type is not a string or subjects is neither a
+                       list nor a dictionary.
+        """
+        if not isinstance(school_type, str):
+            raise TypeError("school_type must be a string.")
+        base_path = (school_type,) + tuple(path)
+        if isinstance(subjects, list):
+            subject_lists = [(base_path, subjects)]
+        elif isinstance(subjects, dict):
+            subject_lists = [
+                (base_path + leaf_path, value)
+                for event, leaf_path, value in _walk_subjects(subjects)
+                if event is _LEAF and isinstance(value, list)
+            ]
+        else:
+            raise TypeError("subjects must be a list or a dictionary.")
+
+        with self._lock:
+            if school_type in self._removed_types:
+                self._compact()
+            new_name_keys, new_word_keys = [], []
+            added = 0
+            for subject_path, subject_list in subject_lists:
+                for subject in subject_list:
+                    name = subject.get("name") if isinstance(subject, dict) else subject
+                    if isinstance(name, str) and self._add(
+                            name, subject_path, new_name_keys, new_word_keys):
+                        added += 1
+            for keys, new_keys in ((self._name_keys, new_name_keys),
+                                   (self._word_keys, new_word_keys)):
+                if len(new_keys) <= _INSERT_LIMIT:
+                    for key in new_keys:
+                        insort(keys, key)
+                else:
+                    # Timsort merges the appended run in close to linear time
+                    keys.extend(new_keys)
+                    keys.sort()
+        return added
+
+    def add_preset(self, school_type, preset):
+        """
+        Indexes the subjects of a preset dictionary.
+        """
+        return self.add_subjects(school_type, preset.get("subjects", []))
+
+    def add_structure(self, school_type, structure):
+        """
+        Indexes the subjects of a 'standard' generate_structure output.
+        """
+        return self.add_subjects(school_type, structure.get("subjects", []))
+
+    def remove_school_type(self, school_type):
+        """
+        Removes every subject of a school type from the results. The index is
+        compacted lazily, the next time subjects of that school type are added.
+        """
+        with self._lock:
+            self._removed_types.add(school_type)
+
+    def search_prefix(self, query, limit=10, school_type=None):
+        """
+        Finds subjects whose name, or one of whose words, starts with the query.
+        Names that start with the query are ranked first, each group in
+        alphabetical order. Only as many index entries as needed are visited.
+
+        Args:
+            query (str): The text typed so far. Case and repeated whitespace are ignored.
+            limit (int): Maximum number of hits to return.
+            school_type (str): Optional school type to restrict the search to.
+
+        Returns:
+            list: Hits as {'name', 'path', 'score'} dictionaries, where path is a
+                  list starting with the school type and score is 1.0.
+        """
+        prefix = _normalize(query)
+        if not prefix or limit < 1:
+            return []
+        with self._lock:
+            ranked = []
+            hit_count = 0
+            for keys in (self._name_keys, self._word_keys):
+                position = bisect_left(keys, (prefix, -1))
+                while (hit_count < limit and position < len(keys)
+                        and keys[position][0].startswith(prefix)):
+                    name_id = keys[position][1]
+                    position += 1
+                    if name_id in ranked:
+                        continue # Several words of one name can match
+                    visible = len(self._visible_paths(name_id, school_type))
+                    if visible:
+                        ranked.append(name_id)
+                        hit_count += visible
+            return self._hits(ranked, [1.0] * len(ranked), limit, school_type)
+
+    def search_fuzzy(self, query, limit=10, min_score=0.3, school_type=None):
+        """
+        Finds subjects whose names share enough trigrams with the query,
+        tolerating typos and transpositions.
+
+        Only the posting lists of the query's rarest trigrams are read: a name
+        reaching min_score must share at least a minimum number of trigrams
+        with the query, and therefore one of its rarest ones that occur in the
+        index at all. The better the hits found so far, the more trigrams a
+        better name must share and the fewer lists need to be read. The hits
+        are the same as those of scoring every name.
+
+        Args:
+            query (str): The search text.
+            limit (int): Maximum number of hits to return.
+            min_score (float): Minimum Dice similarity between 0 and 1.
+            school_type (str): Optional school type to restrict the search to.
+
+        Returns:
+            list: Hits as {'name', 'path', 'score'} dictionaries, best first.
+        """
+        grams = _trigrams(_normalize(query))
+        if not grams or limit < 1:
+            return []
+        query_size = len(grams)
+        # Dice = 2c / (q + n) and c <= n, so a hit shares c >= s * q / (2 - s) trigrams
+        min_common = max(1, ceil(min_score * query_size / (2.0 - min_score) - 1e-9))
+        if min_common > query_size:
+            return []
+        with self._lock:
+            postings = self._postings
+            # Trigrams no name contains cannot be shared
+            present = sorted(
+                (len(postings[gram]), gram) for gram in grams if gram in postings
+            )
+            if len(present) < min_common:
+                return []
+            ranked, scores = self._fuzzy_ranked(
+                grams, present, min_common, min_score, limit, school_type
+            )
+            return self._hits(ranked, scores, limit, school_type)
+
+    def search(self, query, limit=10, min_score=0.3, school_type=None):
+        """
+        Prefix matches first, topped up with fuzzy matches when there are fewer
+        than `limit` of them. Fuzzy hits have a score below 1.0.
+
+        Returns:
+            list: Hits as {'name', 'path', 'score'} dictionaries.
+        """
+        hits = self.search_prefix(query, limit, school_type)
+        if len(hits) < limit:
+            found = {(hit["name"], tuple(hit["path"])) for hit in hits}
+            for hit in self.search_fuzzy(query, limit, min_score, school_type):
+                if (hit["name"], tuple(hit["path"])) not in found:
+                    hits.append(hit)
+                    if len(hits) >= limit:
+                        break
+        return hits
+
+    def _fuzzy_ranked(self, grams, present, min_common, min_score, limit, school_type):
+        """
+        Helper to find the best scoring visible names for a query's trigrams.
+
+        A name scoring at least the current threshold shares at least
+        min_common trigrams with the query, and is therefore found in one of
+        the (len(present) - min_common + 1) rarest posting lists. The rarest
+        lists within the posting budget are counted first, and names are
+        scored by descending count while the lists not read could still lift
+        them to min_common. Once `limit` hits are found, the threshold rises to
+        the lowest of their scores, which raises min_common; further lists are
+        only read if it still requires them.
+
+        Returns:
+            tuple: (name ids, scores) of up to `limit` visible names, best first.
+        """
+        postings = self._postings
+        gram_counts = self._gram_counts
+        normalized = self._normalized
+        query_size = len(grams)
+
+        read, budget = 1, _FUZZY_POSTING_BUDGET - present[0][0]
+        while read <= len(present) - min_common and present[read][0] <= budget:
+            budget -= present[read][0]
+            read += 1
+        counts = Counter(chain.from_iterable(postings[gram] for _, gram in present[:read]))
+
+        best_scores = []            # heap of the best `limit` visible scores
+        threshold = min_score
+        scored = []
+        checked = set()
+        while True:
+            unread = [gram for _, gram in present[read:]]
+            for name_id, count in counts.most_common():
+                # The unread lists can add at most one shared trigram each
+                most = count + len(unread)
+                if most < min_common:
+                    break
+                if name_id in checked:
+                    continue
+                checked.add(name_id)
+                size = gram_counts[name_id]
+                if 2.0 * min(most, size) < threshold * (query_size + size):
+                    continue
+                common = count
+                if unread:
+                    padded = f"  {normalized[name_id]} "
+                    common += sum(gram in padded for gram in unread)
+                score = 2.0 * common / (query_size + size)
+                if score < threshold or not self._visible_paths(name_id, school_type):
+                    continue
+                scored.append((score, name_id))
+                if len(best_scores) < limit:
+                    heappush(best_scores, score)
+                else:
+                    heapreplace(best_scores, score)
+                if len(best_scores) >= limit and best_scores[0] > threshold:
+                    threshold = best_scores[0]
+                    min_common = max(min_common, ceil(
+                        threshold * query_size / (2.0 - threshold) - 1e-9
+                    ))
+
+            required = len(present) - min_common + 1
+            if read >= required:
+                break
+            counts.update(chain.from_iterable(
+                postings[gram] for _, gram in present[read:required]
+            ))
+            read = required
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        del scored[limit:]
+        return [name_id for _, name_id in scored], [round(score, 4) for score, _ in scored]
+
+    def _add(self, name, path, new_name_keys, new_word_keys):
+        normalized = _normalize(name)
+        if not normalized:
+            return False
+        name_id = self._name_ids.get(normalized)
+        if name_id is None:
+            name_id = len(self._names)
+            self._name_ids[normalized] = name_id
+            self._names.append(name)
+            self._normalized.append(normalized)
+            self._paths.append([])
+            grams = _trigrams(normalized)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(name_id)
+            new_name_keys.append((normalized, name_id))
+            new_word_keys.extend((suffix, name_id) for suffix in _word_suffixes(normalized))
+        if (name_id, path) in self._known_paths:
+            return False
+        self._known_paths.add((name_id, path))
+        self._paths[name_id].append(path)
+        return True
+
+    def _compact(self):
+        """
+        Drops the paths of removed school types. Names without any remaining
+        path stay indexed but are never returned.
+        """
+        removed = self._removed_types
+        for name_id, paths in enumerate(self._paths):
+            if any(path[0] in removed for path in paths):
+                self._paths[name_id] = [path for path in paths if path[0] not in removed]
+        self._known_paths = {pair for pair in self._known_paths if pair[1][0] not in removed}
+        self._removed_types = set()
+
+    def _visible_paths(self, name_id, school_type):
+        removed = self._removed_types
+        return [
+            path for path in self._paths[name_id]
+            if path[0] not in removed and (school_type is None or path[0] == school_type)
+        ]
+
+    def _hits(self, name_ids, scores, limit, school_type):
+        hits = []
+        for name_id, score in zip(name_ids, scores):
+            for path in self._visible_paths(name_id, school_type):
+                hits.append({"name": self._names[name_id], "path": list(path), "score": score})
+                if len(hits) >= limit:
+                    return hits
+        return hits
+
+
+def build_index(school_types=None):
+    """
+    Builds a SubjectIndex over registered presets.
+
+    Args:
+        school_types (list): School types to index. Defaults to every available
+                             school type, see list_school_types().
+
+    Returns:
+        SubjectIndex: The populated index.
+
+    Raises:
+        ValueError: If a school type does not exist.
+    """
+    index = SubjectIndex()
+    for school_type in (school_types if school_types is not None else preset_registry.names()):
+        index.add_preset(school_type, preset_registry.get(school_type))
+    return index
+
+
+def _normalize(text):
+    """
+    Helper to make names comparable: case-folded with single spaces.
+    """
+    return " ".join(text.casefold().split())
+
+
+def _word_suffixes(normalized):
+    """
+    Helper to list the suffixes of a name that start at its second or later words.
+    """
+    suffixes = []
+    for position, char in enumerate(normalized):
+        if char == " ":
+            suffixes.append(normalized[position + 1:])
+    return suffixes
+
+
+def _trigrams(normalized):
+    """
+    Helper to split a normalized name into its distinct, space-padded trigrams.
+    """
+    if not normalized:
+        return set()
+    padded = f"  {normalized} "
+    return {padded[i:i + _GRAM_SIZE] for i in range(len(padded) - _GRAM_SIZE + 1)}
@@ -0,0 +1,266 @@
+# course_model/serialize.py
+
+"""
+This module serves generated structures as pre-serialized UTF-8 JSON, for
+HTTP APIs where json.dumps would otherwise dominate the cost of a request.
+
+Serialized bodies are cached per (school_type, options) together with an
+ETag derived from the structure's content fingerprint (see fingerprint.py).
+For nested structures, the serialized fragment of every faculty is cached
+separately under its own fingerprint, so when only one faculty changes
+between two option sets, the other faculties are not serialized again.
+
+The bytes are identical to:
+
+    json.dumps(generate_structure(school_type, **options),
+               ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+Example:
+    from course_model.serialize import generate_json, stream_json
+
+    body, etag = generate_json("university", integration_metadata=metadata)
+    if request_etag == etag:
+        return 304
+    etag, chunks = stream_json("university", chunk_size=65536)
+"""
+
+import json
+
+from .cache import StructureCache
+from .core import _get_preset
+from .fingerprint import _fingerprint_customized
+from .registry import preset_registry
+from .utils import (
+    _validate_options, _apply_customizations, _format_output, _iter_db_schema_rows,
+    _canonicalize_options, DEFAULT_PATH_COLUMNS
+)
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+# Whole bodies per (school_type, options), and faculty fragments per fingerprint
+_json_cache = StructureCache(maxsize=256)
+_fragment_cache = StructureCache(maxsize=4096)
+preset_registry.add_listener(_json_cache.invalidate)
+
+
+def generate_json(school_type='secondary', **options):
+    """
+    Returns a structure serialized as compact UTF-8 JSON, with its ETag.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        **options: Customization options, see generate_structure.
+
+    Returns:
+        tuple: (body, etag). body is bytes; etag is a quoted strong entity tag
+               that only changes when the serialized content changes.
+
+    Raises:
+        ValueError: If an invalid school_type is provided or options are malformed.
+        TypeError: If an option has an incorrect type.
+    """
+    cache_key = _get_json_cache_key(school_type, options)
+    if cache_key is not None:
+        cached = _json_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    etag, parts = _serialize(school_type, options)
+    result = (b"".join(parts), etag)
+    if cache_key is not None:
+        _json_cache.set(cache_key, result)
+    return result
+
+
+def stream_json(school_type='secondary', chunk_size=65536, **options):
+    """
+    Serializes a structure as compact UTF-8 JSON chunks, for large catalogs.
+
+    The ETag is computed up front so it can be sent as a header before the
+    body. Faculties are serialized while the chunks are consumed, and the
+    complete body is cached once the iterator is exhausted.
+
+    Args:
+        school_type (str): The type of school (e.g., 'primary', 'secondary', 'university').
+        chunk_size (int): Approximate size in bytes of each yielded chunk.
+        **options: Customization options, see generate_structure.
+
+    Returns:
+        tuple: (etag, chunks) where chunks is an iterator of bytes.
+
+    Raises:
+        ValueError: If an invalid school_type is provided, options are malformed
+                    or chunk_size is not positive.
+        TypeError: If an option has an incorrect type.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    cache_key = _get_json_cache_key(school_type, options)
+    if cache_key is not None:
+        cached = _json_cache.get(cache_key)
+        if cached is not None:
+            body, etag = cached
+            return etag, (body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+
+    etag, parts = _serialize(school_type, options)
+    return etag, _rechunk(parts, chunk_size, cache_key, etag)
+
+
+def configure_json_cache(maxsize=None, fragment_maxsize=None, ttl=None):
+    """
+    Configures the caches of serialized bodies and faculty fragments.
+
+    Args:
+        maxsize (int): Maximum number of cached bodies (default 256). 0 disables it.
+        fragment_maxsize (int): Maximum number of cached faculty fragments
+                                (default 4096). 0 disables fragment reuse.
+        ttl (float): Seconds after which cached bodies and fragments expire.
+
+    Raises:
+        ValueError: If a size or ttl is negative.
+    """
+    _json_cache.configure(maxsize=maxsize, ttl=ttl)
+    _fragment_cache.configure(maxsize=fragment_maxsize, ttl=ttl)
+    for cache in (_json_cache, _fragment_cache):
+        if not cache.enabled:
+            cache.invalidate()
+
+
+def clear_json_cache(school_type=None):
+    """
+    Removes cached bodies, and all fragments when no school_type is given.
+
+    Returns:
+        int: The number of cached bodies removed.
+    """
+    if school_type is None:
+        _fragment_cache.invalidate()
+    return _json_cache.invalidate(school_type)
+
+
+def json_cache_info():
+    """
+    Returns the statistics of both caches.
+
+    Returns:
+        dict: {'bodies': {...}, 'fragments': {...}}, see cache_info().
+    """
+    return {"bodies": _json_cache.stats(), "fragments": _fragment_cache.stats()}
+
+
+def _get_json_cache_key(school_type, options):
+    """
+    Helper to build the body cache key, or None if it cannot be cached.
+    """
+    if not _json_cache.enabled:
+        return None
+    try:
+        return (school_type, _canonicalize_options(options))
+    except (TypeError, RecursionError):
+        return None
+
+
+def _serialize(school_type, options):
+    """
+    Customizes and fingerprints a structure, and returns its ETag with a lazy
+    iterator over the serialized parts of its body.
+    """
+    base_structure = _get_preset(school_type)
+    _validate_options(options)
+    customized_structure = _apply_customizations(base_structure, options)
+    fingerprints = _fingerprint_customized(customized_structure, options)
+    etag = f'"{fingerprints["hash"]}"'
+
+    output_format = options.get('output_format', 'standard')
+    if (output_format == 'columnar' or not isinstance(customized_structure["subjects"], dict)
+            or (output_format == 'db_schema' and "offerings" in customized_structure)):
+        # Interned lookup tables, flat subject lists and level_subjects tables
+        # are serialized as a whole
+        parts = iter((_encode(_format_output(customized_structure, options)).encode("utf-8"),))
+    else:
+        parts = _iter_parts(customized_structure, options, fingerprints, output_format)
+    return etag, parts
+
+
+def _iter_parts(structure, options, fingerprints, output_format):
+    """
+    Helper to yield the body of a nested structure piece by piece, reusing the
+    cached fragments of faculties whose fingerprint is unchanged.
+    """
+    metadata = options.get('integration_metadata', {})
+    path_columns = options.get('path_columns', DEFAULT_PATH_COLUMNS)
+    levels_only = _format_output({"levels": structure["levels"], "subjects": []}, options)
+    faculty_hashes = fingerprints["subjects"]["children"]
+
+    if output_format == 'db_schema':
+        yield b'{"levels_table":' + _encode(levels_only["levels_table"]).encode("utf-8")
+        yield b',"subjects_table":['
+        separator = b""
+        for key, value in structure["subjects"].items():
+            fragment = _fragment(
+                ("db_schema", key, faculty_hashes[key]["hash"]) if key in faculty_hashes else None,
+                lambda: b",".join(
+                    _encode(row).encode("utf-8") for _, row in _iter_db_schema_rows(
+                        {"levels": [], "subjects": {key: value}}, metadata,
+                        path_columns=path_columns
+                    )
+                )
+            )
+            if fragment:
+                yield separator + fragment
+                separator = b","
+        yield b"]}"
+        return
+
+    yield b'{"levels":' + _encode(levels_only["levels"]).encode("utf-8")
+    yield b',"subjects":{'
+    separator = b""
+    for key, value in structure["subjects"].items():
+        fragment = _fragment(
+            ("standard", key, faculty_hashes[key]["hash"]) if key in faculty_hashes else None,
+            lambda: _encode(
+                _format_output({"levels": [], "subjects": {key: value}}, options)["subjects"][key]
+            ).encode("utf-8")
+        )
+        yield separator + _encode(key).encode("utf-8") + b":" + fragment
+        separator = b","
+    yield b"}}"
+
+
+def _fragment(key, serialize):
+    """
+    Helper to return a cached faculty fragment, serializing and caching it if needed.
+    Faculties without a fingerprint (non-list leaves) are never cached.
+    """
+    if key is not None:
+        fragment = _fragment_cache.get(key)
+        if fragment is not None:
+            return fragment
+    fragment = serialize()
+    if key is not None:
+        _fragment_cache.set(key, fragment)
+    return fragment
+
+
+def _rechunk(parts, chunk_size, cache_key, etag):
+    """
+    Helper to regroup serialized parts into chunks of about chunk_size bytes,
+    caching the complete body once every part was produced.
+    """
+    produced = []
+    buffer, buffered = [], 0
+    for part in parts:
+        produced.append(part)
+        buffer.append(part)
+        buffered += len(part)
+        if buffered >= chunk_size:
+            chunk = b"".join(buffer)
+            full = len(chunk) - len(chunk) % chunk_size
+            for i in range(0, full, chunk_size):
+                yield chunk[i:i + chunk_size]
+            buffer = [chunk[full:]] if full < len(chunk) else []
+            buffered = len(chunk) - full
+    if buffer:
+        yield b"".join(buffer)
+    if cache_key is not None:
+        _json_cache.set(cache_key, (b"".join(produced), etag))
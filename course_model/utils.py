@@ -6,6 +6,12 @@ handling input validation, applying customizations to preset data,
 and formatting the output structure.
 """
 
+import sys
+from time import perf_counter
+
+from .exclusions import ExclusionMatcher, compile_exclusions, _check_rule
+from .offerings import OfferingMatrix, _check_offerings
+
 def _validate_options(options):
     """
     Validates the input options provided to generate_structure.
@@ -24,133 +30,479 @@ def _validate_options(options):
         if key == 'custom_subjects':
             if not isinstance(value, (list, dict)):
                 raise TypeError("custom_subjects must be a list or a dictionary.")
+            _check_custom_subjects(value)
         elif key == 'exclude_subjects':
             if not isinstance(value, list):
                 raise TypeError("exclude_subjects must be a list.")
+            for rule in value:
+                _check_rule(rule)
         elif key == 'custom_levels':
             if not isinstance(value, list):
                 raise TypeError("custom_levels must be a list.")
         elif key == 'exclude_levels':
             if not isinstance(value, list):
                 raise TypeError("exclude_levels must be a list.")
+            for rule in value:
+                _check_rule(rule)
         elif key == 'level_pattern':
             if not isinstance(value, str):
                 raise TypeError("level_pattern must be a string.")
             if "{i}" not in value:
                 raise ValueError("level_pattern must contain '{i}' placeholder.")
         elif key == 'output_format':
-            if value not in ['standard', 'db_schema']:
-                raise ValueError("output_format must be 'standard' or 'db_schema'.")
+            if value not in ['standard', 'db_schema', 'columnar']:
+                raise ValueError("output_format must be 'standard', 'db_schema' or 'columnar'.")
+        elif key == 'path_columns':
+            if not isinstance(value, (list, tuple)) or not value:
+                raise TypeError("path_columns must be a non-empty list of column names.")
+            if not all(isinstance(column, str) and column for column in value):
+                raise TypeError("path_columns must only contain non-empty strings.")
+            reserved = {"subject_name", "external_id", "lms_tag"}
+            if len(set(value)) != len(value) or reserved & set(value):
+                raise ValueError(
+                    "path_columns must be unique and cannot use subject_name, external_id or lms_tag."
+                )
         elif key == 'integration_metadata':
             if not isinstance(value, dict):
                 raise TypeError("integration_metadata must be a dictionary.")
             if not all(k in value for k in ['external_id', 'lms_tag']):
                 raise ValueError("integration_metadata must contain 'external_id' and 'lms_tag'.")
+        elif key == 'offerings':
+            _check_offerings(value)
         # Add more validation for other options if needed
         else:
             # Allow unknown options to be passed through, but log a warning if desired
             pass
 
 
-def _apply_customizations(preset_structure, options):
+def _check_custom_subjects(custom_subjects):
+    """
+    Deeply validates a custom_subjects payload without recursion: every key
+    must be a string, every leaf a list, and every subject name a string.
+
+    Raises:
+        TypeError: If a key, leaf or subject name has an incorrect type.
+    """
+    if isinstance(custom_subjects, list):
+        subject_lists = [((), custom_subjects)]
+    else:
+        subject_lists = []
+        for event, path, value in _walk_subjects(custom_subjects):
+            if not isinstance(path[-1], str):
+                raise TypeError(
+                    f"custom_subjects keys must be strings, got {path[-1]!r} "
+                    f"at {'/'.join(map(str, path[:-1])) or 'the top level'}."
+                )
+            if event is _LEAF:
+                if not isinstance(value, list):
+                    raise TypeError(
+                        f"custom_subjects at '{'/'.join(path)}' must be a list or a "
+                        f"dictionary, got {type(value).__name__}."
+                    )
+                subject_lists.append((path, value))
+
+    for path, subjects in subject_lists:
+        for subject in subjects:
+            if not isinstance(subject, str):
+                location = f" at '{'/'.join(path)}'" if path else ""
+                raise TypeError(
+                    f"custom_subjects names must be strings, got {subject!r}{location}."
+                )
+
+
+# Column order of the db_schema tables, used for tuple rows and tabular exports.
+# The subjects table has one column per path level, see the path_columns option.
+DEFAULT_PATH_COLUMNS = ("faculty_name", "department_name")
+LEVELS_COLUMNS = ("level_name", "level_order", "external_id", "lms_tag")
+SUBJECTS_COLUMNS = ("subject_name",) + DEFAULT_PATH_COLUMNS + ("external_id", "lms_tag")
+LEVEL_SUBJECTS_COLUMNS = (
+    ("level_name", "subject_name") + DEFAULT_PATH_COLUMNS + ("external_id", "lms_tag")
+)
+
+# Options whose list values are treated as sets, so their order does not
+# affect the generated structure.
+_UNORDERED_OPTIONS = ('exclude_subjects', 'exclude_levels')
+
+
+def _canonicalize_options(options):
+    """
+    Converts generate_structure options into a hashable key.
+
+    Options are sorted by name, and the exclusion lists are converted to
+    frozensets since their order does not matter. Dictionaries (including
+    nested custom_subjects and integration_metadata) and other lists keep
+    their order, since it decides the order of faculties and metadata fields
+    in the output.
+
+    Args:
+        options (dict): The options passed to generate_structure.
+
+    Returns:
+        tuple: A hashable representation of the options.
+
+    Raises:
+        TypeError: If an option value cannot be made hashable.
+    """
+    canonical = []
+    for key in sorted(options):
+        value = options[key]
+        if key in _UNORDERED_OPTIONS and isinstance(value, list):
+            canonical.append((key, frozenset(_canonicalize_value(v) for v in value)))
+        else:
+            canonical.append((key, _canonicalize_value(value)))
+    return tuple(canonical)
+
+
+def _canonicalize_value(value):
+    """
+    Helper to recursively convert an option value into a hashable form.
+    Dictionaries and lists are tagged so that they never collide with each other,
+    and scalars are tagged with their type, since 1, 1.0 and True compare equal
+    but are rendered differently.
+    """
+    if isinstance(value, dict):
+        return ('dict', tuple(
+            (_canonicalize_value(k), _canonicalize_value(v)) for k, v in value.items()
+        ))
+    elif isinstance(value, (list, tuple)):
+        return ('list', tuple(_canonicalize_value(v) for v in value))
+    elif isinstance(value, (set, frozenset)):
+        return ('set', frozenset(_canonicalize_value(v) for v in value))
+    hash(value)  # Raises TypeError for unhashable values
+    return (type(value), value)
+
+
+def _copy_output(value):
+    """
+    Helper to copy a generated structure so that callers cannot modify cached data.
+    Only dictionaries and lists are copied; strings and numbers are immutable.
+    Works iteratively, so arbitrarily deep structures can be copied.
+    """
+    if not isinstance(value, (dict, list)):
+        return value
+    copied = value.copy()
+    pending = [copied]
+    while pending:
+        container = pending.pop()
+        items = container.items() if isinstance(container, dict) else enumerate(container)
+        for k, v in items:
+            if isinstance(v, (dict, list)):
+                container[k] = v = v.copy()
+                pending.append(v)
+    return copied
+
+
+def _apply_customizations(preset_structure, options, matchers=None, stats=None):
     """
     Applies custom additions, exclusions, and naming conventions to the
     preset course structure.
 
+    The preset subject tree is never copied as a whole. Faculties, departments
+    and subject lists that are not touched by custom_subjects or exclude_subjects
+    are shared with the preset, so the result must be treated as read-only.
+
     Args:
         preset_structure (dict): The base structure from presets.py.
         options (dict): Customization options provided by the user.
+        matchers (dict): Optional dictionary that receives the compiled
+                         ExclusionMatcher for 'exclude_subjects' and 'exclude_levels',
+                         so callers can inspect which rules matched nothing.
+        stats (dict): Optional instrumentation record with 'stages' and 'counters'
+                      dictionaries. If given, merge/filter timings and the
+                      subjects_visited/dedup_operations counters are added to it.
 
     Returns:
         dict: The customized course structure.
     """
+    if matchers is None:
+        matchers = {}
+    counters = stats["counters"] if stats is not None else None
+    levels, level_names = _customize_levels(
+        preset_structure.get("levels", []), options, matchers, counters,
+        preset_structure.get("level_names")
+    )
     customized_structure = {
-        "levels": list(preset_structure.get("levels", [])),
-        "subjects": _deep_copy_subjects(preset_structure.get("subjects", {}))
+        "levels": levels,
+        "subjects": preset_structure.get("subjects", {}) # Shared, copied on write
     }
-
-    # Apply level customizations
-    if 'custom_levels' in options:
-        customized_structure["levels"].extend(options['custom_levels'])
-        # Ensure uniqueness
-        customized_structure["levels"] = list(dict.fromkeys(customized_structure["levels"]))
-
-    if 'exclude_levels' in options:
-        customized_structure["levels"] = [
-            level for level in customized_structure["levels"]
-            if level not in options['exclude_levels']
-        ]
-
-    if 'level_pattern' in options and customized_structure["levels"]:
-        num_levels = len(customized_structure["levels"])
-        customized_structure["levels"] = [
-            options['level_pattern'].format(i=i + 1) for i in range(num_levels)
-        ]
+    if level_names != levels:
+        # Offering rules match the level names from before level_pattern
+        customized_structure["level_names"] = level_names
 
     # Apply subject customizations
     if 'custom_subjects' in options:
+        if stats is not None:
+            start = perf_counter()
         if isinstance(customized_structure["subjects"], dict):
+            _check_nested_custom_subjects(options['custom_subjects'])
             # For hierarchical subjects (e.g., university)
-            _merge_nested_subjects(customized_structure["subjects"], options['custom_subjects'])
+            customized_structure["subjects"] = _merge_nested_subjects(
+                customized_structure["subjects"], options['custom_subjects'], counters
+            )
         elif isinstance(customized_structure["subjects"], list):
             # For flat subjects (e.g., primary)
             if isinstance(options['custom_subjects'], list):
-                customized_structure["subjects"].extend(options['custom_subjects'])
-                customized_structure["subjects"] = list(dict.fromkeys(customized_structure["subjects"]))
+                customized_structure["subjects"] = list(dict.fromkeys(
+                    customized_structure["subjects"] + options['custom_subjects']
+                ))
+                if counters is not None:
+                    counters["dedup_operations"] += 1
+                    counters["subjects_visited"] += len(customized_structure["subjects"])
             else:
                 # Log warning or raise error if custom_subjects type doesn't match
                 pass # For simplicity, we'll assume matching types or handle gracefully
+        if stats is not None:
+            stats["stages"]["merge"] = perf_counter() - start
 
     if 'exclude_subjects' in options:
+        if stats is not None:
+            start = perf_counter()
+        matchers['exclude_subjects'] = compile_exclusions(options['exclude_subjects'])
         if isinstance(customized_structure["subjects"], dict):
             # For hierarchical subjects
-            _filter_nested_subjects(customized_structure["subjects"], options['exclude_subjects'])
+            customized_structure["subjects"] = _filter_nested_subjects(
+                customized_structure["subjects"], matchers['exclude_subjects']
+            )
         elif isinstance(customized_structure["subjects"], list):
             # For flat subjects
-            customized_structure["subjects"] = [
-                subject for subject in customized_structure["subjects"]
-                if subject not in options['exclude_subjects']
-            ]
+            customized_structure["subjects"] = matchers['exclude_subjects'].filter(
+                customized_structure["subjects"]
+            )
+        if stats is not None:
+            stats["stages"]["filter"] = perf_counter() - start
+            counters["subjects_visited"] += matchers['exclude_subjects'].visited
+
+    if options.get('offerings', False) is not False:
+        customized_structure["offerings"] = _resolve_offerings(preset_structure, options['offerings'])
 
     return customized_structure
 
 
-def _deep_copy_subjects(subjects):
+def _resolve_offerings(preset_structure, offerings):
+    """
+    Helper to return the offering rules selected by the offerings option:
+    the preset's own rules for True, otherwise the given rules.
+    """
+    if offerings is True:
+        offerings = preset_structure.get("offerings", [])
+        _check_offerings(offerings) # Presets may come from user-supplied files
+    return offerings
+
+
+def _compile_offerings(structure):
     """
-    Helper to deep copy subject structures, handling lists and nested dictionaries.
+    Helper to build the OfferingMatrix of a customized structure from its
+    "offerings" rules (none if the structure has no rules).
     """
+    subjects = structure["subjects"]
     if isinstance(subjects, dict):
-        return {k: _deep_copy_subjects(v) for k, v in subjects.items()}
+        subject_lists = [
+            (path, value) for event, path, value in _walk_subjects(subjects)
+            if event is _LEAF and isinstance(value, list)
+        ]
     elif isinstance(subjects, list):
-        return list(subjects)
+        subject_lists = [((), subjects)]
     else:
-        return subjects
+        subject_lists = []
+    return OfferingMatrix(
+        structure["levels"], subject_lists, structure.get("offerings", []),
+        structure.get("level_names")
+    )
 
 
-def _merge_nested_subjects(target_dict, source_dict):
+def _customize_levels(levels, options, matchers=None, counters=None, level_names=None):
     """
-    Recursively merges source_dict into target_dict for nested subject structures.
+    Applies custom_levels, exclude_levels and level_pattern to a level list.
+
+    level_names optionally gives the names the levels had before an earlier
+    level_pattern renamed them, in level order.
+
+    Returns:
+        tuple: (customized levels, their names before any level_pattern).
+               The input lists are not modified.
+    """
+    names = dict(zip(levels, level_names)) if level_names is not None else {}
+    levels = list(levels)
+    if 'custom_levels' in options:
+        levels.extend(options['custom_levels'])
+        # Ensure uniqueness
+        levels = list(dict.fromkeys(levels))
+        if counters is not None:
+            counters["dedup_operations"] += 1
+
+    if 'exclude_levels' in options:
+        matcher = compile_exclusions(options['exclude_levels'], allow_paths=False)
+        if matchers is not None:
+            matchers['exclude_levels'] = matcher
+        levels = matcher.filter(levels)
+
+    names = [names.get(level, level) for level in levels]
+    if 'level_pattern' in options and levels:
+        levels = [options['level_pattern'].format(i=i + 1) for i in range(len(levels))]
+    return levels, names
+
+
+def _check_nested_custom_subjects(custom_subjects):
+    """
+    Helper to reject custom_subjects lists for school types with nested subjects.
+
+    Raises:
+        TypeError: If custom_subjects is not a dictionary.
+    """
+    if not isinstance(custom_subjects, dict):
+        raise TypeError(
+            "custom_subjects must be a dictionary for school types with nested subjects."
+        )
+
+
+# Events yielded by _walk_subjects
+_ENTER, _LEAF, _EXIT = 'enter', 'leaf', 'exit'
+
+
+def _walk_subjects(subjects_dict, descend=None):
+    """
+    Iteratively walks a nested subject dictionary in pre-order, without
+    recursion, so arbitrarily deep hierarchies are supported.
+
+    Args:
+        subjects_dict (dict): The nested subject structure.
+        descend (callable): Optional descend(path, value) predicate deciding whether
+                            a nested dictionary is entered. Dictionaries that are not
+                            entered are reported as leaves.
+
+    Yields:
+        tuple: (event, path, value) where event is _ENTER when a dictionary is
+               entered, _LEAF for subject lists and other values, and _EXIT when a
+               dictionary is left (value is None). path is the tuple of keys
+               leading to the value, including its own key.
+    """
+    stack = [((), iter(subjects_dict.items()))]
+    while stack:
+        path, items = stack[-1]
+        for key, value in items:
+            child_path = path + (key,)
+            if isinstance(value, dict) and (descend is None or descend(child_path, value)):
+                yield _ENTER, child_path, value
+                stack.append((child_path, iter(value.items())))
+                break
+            yield _LEAF, child_path, value
+        else:
+            stack.pop()
+            if stack:
+                yield _EXIT, path, None
+
+
+def _merge_subject_value(value, custom_value):
+    """
+    Merges one custom_subjects value into the preset value with the same key,
+    exactly like _merge_nested_subjects does. Used by the lazy view.
+
+    Returns:
+        tuple: (merged value, custom dictionary still to merge into it or None).
+               Two dictionaries are merged lazily: the preset dictionary is
+               returned together with the custom one.
+    """
+    if isinstance(value, dict) and isinstance(custom_value, dict):
+        return value, custom_value
+    if isinstance(value, list) and isinstance(custom_value, list):
+        return list(dict.fromkeys(value + custom_value)), None # Ensure uniqueness
+    return custom_value, None
+
+
+def _map_subject_lists(subjects_dict, transform, share_unchanged=True):
+    """
+    Rebuilds a nested subject dictionary with every subject list replaced by
+    transform(path, subject_list).
+
+    Args:
+        subjects_dict (dict): The nested subject structure. It is not modified.
+        transform (callable): Called with the path and list of every subject list.
+        share_unchanged (bool): If True, dictionaries whose lists were all returned
+                                unchanged (the same object) are reused instead of copied.
+
+    Returns:
+        dict: The rebuilt structure, or subjects_dict itself if nothing changed
+              and share_unchanged is True.
+    """
+    # Each builder is [source dict, new dict, changed flag]
+    builders = [[subjects_dict, {}, False]]
+    for event, path, value in _walk_subjects(subjects_dict):
+        if event is _ENTER:
+            builders.append([value, {}, False])
+            continue
+
+        if event is _EXIT:
+            source, value, changed = builders.pop()
+            new_value = value if changed or not share_unchanged else source
+        elif isinstance(value, list):
+            source, new_value = value, transform(path, value)
+        else:
+            source = new_value = value # Should not happen with current structure
+
+        builder = builders[-1]
+        builder[1][path[-1]] = new_value
+        if new_value is not source:
+            builder[2] = True
+
+    source, rebuilt, changed = builders[0]
+    return rebuilt if changed or not share_unchanged else source
+
+
+def _merge_nested_subjects(target_dict, source_dict, counters=None):
+    """
+    Merges source_dict into target_dict for nested subject structures.
     Handles lists of subjects at the deepest level.
+
+    target_dict is not modified. Only the dictionaries and lists on paths
+    touched by source_dict are copied; everything else is shared. If a counters
+    dictionary is given, subjects_visited and dedup_operations are updated.
+
+    Returns:
+        dict: The merged structure.
     """
-    for key, value in source_dict.items():
-        if isinstance(value, dict) and key in target_dict and isinstance(target_dict[key], dict):
-            _merge_nested_subjects(target_dict[key], value)
-        elif isinstance(value, list) and key in target_dict and isinstance(target_dict[key], list):
-            target_dict[key].extend(value)
-            target_dict[key] = list(dict.fromkeys(target_dict[key])) # Ensure uniqueness
+    merged_stack = [dict(target_dict)]
+
+    def descend(path, value):
+        # Only walk into source dictionaries that merge into an existing dictionary
+        return isinstance(merged_stack[-1].get(path[-1]), dict)
+
+    for event, path, value in _walk_subjects(source_dict, descend):
+        merged_dict = merged_stack[-1]
+        key = path[-1] if path else None
+        if event is _ENTER:
+            merged_dict[key] = dict(merged_dict[key])
+            merged_stack.append(merged_dict[key])
+        elif event is _EXIT:
+            merged_stack.pop()
         else:
-            target_dict[key] = value
+            current = merged_dict.get(key)
+            if isinstance(value, list) and isinstance(current, list):
+                merged_dict[key] = list(dict.fromkeys(current + value)) # Ensure uniqueness
+                if counters is not None:
+                    counters["dedup_operations"] += 1
+                    counters["subjects_visited"] += len(current) + len(value)
+            else:
+                merged_dict[key] = value
+    return merged_stack[0]
 
 
 def _filter_nested_subjects(target_dict, exclude_list):
     """
-    Recursively filters subjects from a nested dictionary structure.
+    Filters subjects from a nested dictionary structure in one pass.
+
+    target_dict is not modified. Dictionaries and lists are only copied when
+    they actually contain an excluded subject.
+
+    Args:
+        target_dict (dict): The nested subject structure.
+        exclude_list (list or ExclusionMatcher): Exclusion rules, compiled if needed.
+
+    Returns:
+        dict: The filtered structure, or target_dict itself if nothing was excluded.
     """
-    for key, value in target_dict.items():
-        if isinstance(value, dict):
-            _filter_nested_subjects(value, exclude_list)
-        elif isinstance(value, list):
-            target_dict[key] = [s for s in value if s not in exclude_list]
+    if not isinstance(exclude_list, ExclusionMatcher):
+        exclude_list = compile_exclusions(exclude_list)
+    return _map_subject_lists(target_dict, lambda path, value: exclude_list.filter(value, path))
 
 
 def _format_output(structure, options):
@@ -202,82 +554,272 @@ def _format_output(structure, options):
             "levels_table": [],
             "subjects_table": []
         }
-
-        # Levels table schema hint
-        for i, level_name in enumerate(structure["levels"]):
-            level_entry = {
-                "level_name": level_name,
-                "level_order": i + 1,
-                "external_id": integration_metadata.get('external_id', ''),
-                "lms_tag": integration_metadata.get('lms_tag', '')
-            }
-            db_schema_output["levels_table"].append(level_entry)
-
-        # Subjects table schema hint
-        if isinstance(structure["subjects"], dict):
-            _flatten_nested_subjects_for_db(
-                structure["subjects"],
-                db_schema_output["subjects_table"],
-                integration_metadata
-            )
-        elif isinstance(structure["subjects"], list):
-            for subject_name in structure["subjects"]:
-                subject_entry = {
-                    "subject_name": subject_name,
-                    "external_id": integration_metadata.get('external_id', ''),
-                    "lms_tag": integration_metadata.get('lms_tag', '')
-                }
-                db_schema_output["subjects_table"].append(subject_entry)
+        if "offerings" in structure:
+            db_schema_output["level_subjects"] = []
+        path_columns = options.get('path_columns', DEFAULT_PATH_COLUMNS)
+        for table, row in _iter_db_schema_rows(
+                structure, integration_metadata, path_columns=path_columns):
+            db_schema_output[table].append(row)
 
         return db_schema_output
+
+    elif output_format == 'columnar':
+        return _format_columnar(structure, integration_metadata)
     else:
         # This case should ideally be caught by _validate_options
         return structure # Fallback to original structure
 
 
-def _add_metadata_to_nested_subjects(subjects_dict, metadata):
+def _count_output_rows(final_structure, options):
     """
-    Recursively adds metadata to each subject in a nested dictionary structure.
+    Helper to count the level and subject entries of a formatted structure,
+    used by instrumentation.
     """
-    new_dict = {}
-    for key, value in subjects_dict.items():
+    output_format = options.get('output_format', 'standard')
+    if output_format == 'db_schema':
+        return (len(final_structure["levels_table"]) + len(final_structure["subjects_table"])
+                + len(final_structure.get("level_subjects", ())))
+    elif output_format == 'columnar':
+        return len(final_structure["levels"]["name"]) + len(final_structure["subjects"]["name"])
+
+    rows = len(final_structure["levels"])
+    pending = [final_structure["subjects"]]
+    while pending:
+        value = pending.pop()
         if isinstance(value, dict):
-            new_dict[key] = _add_metadata_to_nested_subjects(value, metadata)
+            pending.extend(value.values())
         elif isinstance(value, list):
-            new_list = []
-            for subject in value:
-                subject_entry = {"name": subject}
-                if metadata:
-                    subject_entry.update(metadata)
-                new_list.append(subject_entry)
-            new_dict[key] = new_list
+            rows += len(value)
+    return rows
+
+
+def _format_columnar(structure, metadata):
+    """
+    Formats a structure as parallel arrays instead of one dictionary per entry.
+
+    Subject faculty/department columns hold indices into the interned
+    "faculties" and "departments" lookup tables (-1 when not applicable), and
+    the integration metadata is stored once for the whole structure.
+
+    Args:
+        structure (dict): The processed course structure.
+        metadata (dict): The integration metadata of the structure.
+
+    Returns:
+        dict: The columnar course structure.
+    """
+    levels = [sys.intern(level) if isinstance(level, str) else level
+              for level in structure["levels"]]
+    columnar_output = {
+        "levels": {
+            "name": levels,
+            "order": list(range(1, len(levels) + 1))
+        },
+        "subjects": {
+            "name": [],
+            "faculty": [],
+            "department": []
+        },
+        "faculties": [],
+        "departments": [],
+        "metadata": dict(metadata)
+    }
+
+    subjects = structure["subjects"]
+    if isinstance(subjects, dict):
+        _collect_columnar_subjects(subjects, columnar_output)
+    elif isinstance(subjects, list):
+        names = [sys.intern(s) if isinstance(s, str) else s for s in subjects]
+        columnar_output["subjects"]["name"] = names
+        columnar_output["subjects"]["faculty"] = [-1] * len(names)
+        columnar_output["subjects"]["department"] = [-1] * len(names)
+
+    return columnar_output
+
+
+def _collect_columnar_subjects(subjects_dict, columnar_output):
+    """
+    Appends nested subjects to the columnar arrays. The first key of a subject's
+    path is its faculty and the deepest key below it is its department.
+    """
+    columns = columnar_output["subjects"]
+    faculty_ids, department_ids = {}, {}
+    for event, path, value in _walk_subjects(subjects_dict):
+        if event is not _LEAF or not isinstance(value, list):
+            continue
+        faculty_index = _intern_index(path[0], faculty_ids, columnar_output["faculties"])
+        department_index = -1
+        if len(path) > 1:
+            department_index = _intern_index(path[-1], department_ids, columnar_output["departments"])
+        columns["name"].extend(sys.intern(s) if isinstance(s, str) else s for s in value)
+        columns["faculty"].extend([faculty_index] * len(value))
+        columns["department"].extend([department_index] * len(value))
+
+
+def _intern_index(name, ids, table):
+    """
+    Helper to return the index of name in a lookup table, appending it if new.
+    """
+    index = ids.get(name)
+    if index is None:
+        index = ids[name] = len(table)
+        table.append(sys.intern(name) if isinstance(name, str) else name)
+    return index
+
+
+def _add_metadata_to_nested_subjects(subjects_dict, metadata):
+    """
+    Adds metadata to each subject in a nested dictionary structure,
+    returning a new structure of subject entries.
+    """
+    def to_entries(path, subjects):
+        if metadata:
+            return [{"name": subject, **metadata} for subject in subjects]
+        return [{"name": subject} for subject in subjects]
+
+    return _map_subject_lists(subjects_dict, to_entries, share_unchanged=False)
+
+
+def _iter_db_schema_rows(structure, metadata, as_tuples=False, path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Lazily yields the rows of the db_schema output format, tagged with their table.
+    Levels are yielded first, followed by subjects in preset order, and by the
+    level_subjects join table if the structure has offering rules.
+
+    Args:
+        structure (dict): The processed course structure.
+        metadata (dict): The integration metadata to include in each row.
+        as_tuples (bool): If True, rows are plain tuples ordered like LEVELS_COLUMNS,
+                          _subjects_columns(path_columns) and
+                          _level_subjects_columns(path_columns) instead of dictionaries.
+        path_columns (tuple): Column names for the keys of a subject's path,
+                              outermost first.
+
+    Yields:
+        tuple: ('levels_table', 'subjects_table' or 'level_subjects', row) pairs.
+    """
+    external_id = metadata.get('external_id', '')
+    lms_tag = metadata.get('lms_tag', '')
+
+    # Levels table schema hint
+    for i, level_name in enumerate(structure["levels"]):
+        if as_tuples:
+            yield "levels_table", (level_name, i + 1, external_id, lms_tag)
         else:
-            new_dict[key] = value # Should not happen with current structure
-    return new_dict
+            yield "levels_table", {
+                "level_name": level_name,
+                "level_order": i + 1,
+                "external_id": external_id,
+                "lms_tag": lms_tag
+            }
+
+    # Subjects table schema hint
+    if isinstance(structure["subjects"], dict):
+        for row in _iter_nested_subjects_for_db(
+                structure["subjects"], metadata, as_tuples, path_columns):
+            yield "subjects_table", row
+    elif isinstance(structure["subjects"], list):
+        empty_path = ('',) * len(path_columns)
+        for subject_name in structure["subjects"]:
+            if as_tuples:
+                yield "subjects_table", (subject_name,) + empty_path + (external_id, lms_tag)
+            else:
+                yield "subjects_table", {
+                    "subject_name": subject_name,
+                    "external_id": external_id,
+                    "lms_tag": lms_tag
+                }
+
+    # Level/subject join table
+    if "offerings" in structure:
+        for row in _iter_level_subject_rows(structure, metadata, as_tuples, path_columns):
+            yield "level_subjects", row
 
 
 def _flatten_nested_subjects_for_db(subjects_dict, subject_list, metadata,
-                                     faculty=None, department=None):
+                                    path_columns=DEFAULT_PATH_COLUMNS):
     """
-    Recursively flattens nested subjects into a list suitable for a DB table,
-    adding faculty and department context.
+    Flattens nested subjects into a list suitable for a DB table,
+    adding the path context (faculty and department by default).
     """
-    for key, value in subjects_dict.items():
-        if isinstance(value, dict):
-            # This is a faculty or department
-            if faculty is None: # This level is a faculty
-                _flatten_nested_subjects_for_db(value, subject_list, metadata, faculty=key)
-            else: # This level is a department
-                _flatten_nested_subjects_for_db(value, subject_list, metadata, faculty=faculty, department=key)
-        elif isinstance(value, list):
-            # This is a list of subjects
+    subject_list.extend(
+        _iter_nested_subjects_for_db(subjects_dict, metadata, path_columns=path_columns)
+    )
+
+
+def _iter_nested_subjects_for_db(subjects_dict, metadata, as_tuples=False,
+                                 path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Yields subject rows from a nested dictionary structure of any depth.
+
+    The keys leading to each subject list fill path_columns in order, missing
+    levels are left empty, and keys deeper than the schema are joined with '/'
+    into the last column.
+    """
+    external_id = metadata.get('external_id', '')
+    lms_tag = metadata.get('lms_tag', '')
+    width = len(path_columns)
+
+    for event, path, value in _walk_subjects(subjects_dict):
+        if event is not _LEAF or not isinstance(value, list):
+            continue
+        path_values = _path_column_values(path, width)
+        if as_tuples:
+            tail = path_values + (external_id, lms_tag)
             for subject_name in value:
-                subject_entry = {
-                    "subject_name": subject_name,
-                    "faculty_name": faculty if faculty else '',
-                    "department_name": department if department else '',
-                    "external_id": metadata.get('external_id', ''),
-                    "lms_tag": metadata.get('lms_tag', '')
-                }
-                subject_list.append(subject_entry)
+                yield (subject_name,) + tail
+        else:
+            # Every row of a subject list shares the same path and metadata columns
+            tail = dict(zip(path_columns, path_values))
+            tail["external_id"] = external_id
+            tail["lms_tag"] = lms_tag
+            for subject_name in value:
+                yield {"subject_name": subject_name, **tail}
+
+
+def _iter_level_subject_rows(structure, metadata, as_tuples=False,
+                             path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Yields one level_subjects row per offered (level, subject) pair, in level
+    order. Like subject rows, rows of flat subject lists have no path columns.
+    """
+    external_id = metadata.get('external_id', '')
+    lms_tag = metadata.get('lms_tag', '')
+    width = len(path_columns)
+    flat = not isinstance(structure["subjects"], dict)
+
+    for level, path, subject in _compile_offerings(structure).iter_pairs():
+        if as_tuples:
+            yield (level, subject) + _path_column_values(path, width) + (external_id, lms_tag)
+        elif flat:
+            yield {"level_name": level, "subject_name": subject,
+                   "external_id": external_id, "lms_tag": lms_tag}
+        else:
+            row = {"level_name": level, "subject_name": subject}
+            row.update(zip(path_columns, _path_column_values(path, width)))
+            row["external_id"] = external_id
+            row["lms_tag"] = lms_tag
+            yield row
 
+
+def _path_column_values(path, width):
+    """
+    Helper to spread a subject path over a fixed number of path columns.
+    """
+    if len(path) > width:
+        path = path[:width - 1] + ("/".join(str(key) for key in path[width - 1:]),)
+    return tuple(path) + ('',) * (width - len(path))
+
+
+def _subjects_columns(path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Returns the subjects table columns for a path column schema.
+    """
+    return ("subject_name",) + tuple(path_columns) + ("external_id", "lms_tag")
+
+
+def _level_subjects_columns(path_columns=DEFAULT_PATH_COLUMNS):
+    """
+    Returns the level_subjects table columns for a path column schema.
+    """
+    return ("level_name", "subject_name") + tuple(path_columns) + ("external_id", "lms_tag")
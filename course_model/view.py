@@ -0,0 +1,211 @@
+# course_model/view.py
+
+"""
+This module provides lazy, read-only views of generated structures, returned
+by generate_structure(..., lazy=True). Levels, faculties and departments are
+customized and formatted only when they are accessed, and each result is
+memoized, so looking up one faculty costs time and memory proportional to
+that faculty rather than to the whole catalog.
+
+Views compare equal to the dictionaries generate_structure returns, and
+to_dict() materializes the full structure.
+
+Example:
+    structure = generate_structure("university", lazy=True, exclude_subjects=["Drama"])
+    engineering = structure["subjects"]["Faculty of Engineering"]   # Nothing formatted yet
+    print(engineering["Civil Engineering"])                         # Only this department
+"""
+
+from collections.abc import Mapping
+
+from .exclusions import compile_exclusions
+from .utils import _apply_customizations, _format_output, _copy_output, _merge_subject_value
+
+_LEVEL_OPTIONS = ('custom_levels', 'exclude_levels', 'level_pattern')
+_MISSING = object()
+
+
+class StructureView(Mapping):
+    """
+    A read-only mapping with the 'levels' and 'subjects' of a standard-format
+    structure. Subject dictionaries are returned as SubjectsView objects; lists
+    are returned as fresh copies, so modifying them never affects the view.
+    """
+
+    def __init__(self, preset, options):
+        """
+        Args:
+            preset (dict): The preset structure to customize.
+            options (dict): Validated generate_structure options.
+        """
+        self._preset = preset
+        self._options = options
+        self._metadata = options.get('integration_metadata', {})
+        self._matcher = (
+            compile_exclusions(options['exclude_subjects'])
+            if 'exclude_subjects' in options else None
+        )
+        self._values = {}
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            if key == "levels":
+                self._values[key] = self._format_levels()
+            elif key == "subjects":
+                self._values[key] = self._format_subjects()
+            else:
+                raise KeyError(key)
+        value = self._values[key]
+        return value if isinstance(value, SubjectsView) else _copy_output(value)
+
+    def __iter__(self):
+        return iter(("levels", "subjects"))
+
+    def __len__(self):
+        return 2
+
+    def __repr__(self):
+        return f"<StructureView levels, subjects ({len(self._values)} of 2 formatted)>"
+
+    def to_dict(self):
+        """
+        Materializes the whole structure.
+
+        Returns:
+            dict: The same structure generate_structure returns without lazy=True.
+        """
+        subjects = self["subjects"]
+        return {
+            "levels": self["levels"],
+            "subjects": subjects.to_dict() if isinstance(subjects, SubjectsView) else subjects
+        }
+
+    def _format_levels(self):
+        level_options = {key: self._options[key] for key in _LEVEL_OPTIONS if key in self._options}
+        customized = _apply_customizations(
+            {"levels": self._preset.get("levels", []), "subjects": []}, level_options
+        )
+        return _format_output(customized, {"integration_metadata": self._metadata})["levels"]
+
+    def _format_subjects(self):
+        subjects = self._preset.get("subjects", {})
+        custom_subjects = self._options.get('custom_subjects')
+        if isinstance(subjects, dict) and (custom_subjects is None or isinstance(custom_subjects, dict)):
+            return SubjectsView(subjects, custom_subjects, (), self)
+
+        # Flat subject lists are small, and mismatched custom_subjects types
+        # must behave exactly like the eager path
+        subject_options = {
+            key: value for key, value in self._options.items() if key not in _LEVEL_OPTIONS
+        }
+        customized = _apply_customizations({"levels": [], "subjects": subjects}, subject_options)
+        return _format_output(customized, {"integration_metadata": self._metadata})["subjects"]
+
+
+class SubjectsView(Mapping):
+    """
+    A read-only mapping over one level of a nested subject dictionary. The
+    custom_subjects of this level are merged in, and exclusions and metadata
+    applied, one key at a time.
+    """
+
+    def __init__(self, source, custom, path, structure):
+        """
+        Args:
+            source (dict): The preset subjects at this level.
+            custom (dict): The custom_subjects at this level, or None.
+            path (tuple): The keys leading to this level.
+            structure (StructureView): The view holding the options.
+        """
+        self._source = source
+        self._custom = custom
+        self._path = path
+        self._structure = structure
+        self._keys = None
+        self._values = {}
+
+    def __getitem__(self, key):
+        value = self._value(key)
+        return value if isinstance(value, SubjectsView) else _copy_output(value)
+
+    def __iter__(self):
+        if self._keys is None:
+            # Same order as the eager merge: preset keys, then new custom keys
+            keys = list(self._source)
+            if self._custom:
+                keys.extend(key for key in self._custom if key not in self._source)
+            self._keys = keys
+        return iter(self._keys)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return key in self._source or (self._custom is not None and key in self._custom)
+
+    def __repr__(self):
+        return f"<SubjectsView {list(self._path)}: {list(self)}>"
+
+    @property
+    def path(self):
+        """
+        The keys leading to this level, as a tuple.
+        """
+        return self._path
+
+    def to_dict(self):
+        """
+        Materializes this level and everything beneath it, without recursion.
+
+        Returns:
+            dict: The same nested dictionary generate_structure returns.
+        """
+        root = {}
+        pending = [(self, root)]
+        while pending:
+            view, target = pending.pop()
+            for key in view:
+                value = view._value(key)
+                if isinstance(value, SubjectsView):
+                    target[key] = {}
+                    pending.append((value, target[key]))
+                else:
+                    target[key] = _copy_output(value)
+        return root
+
+    def _value(self, key):
+        """
+        Helper to merge, filter and format one key, memoizing the result.
+        Nested dictionaries become SubjectsView objects.
+        """
+        if key in self._values:
+            return self._values[key]
+
+        source_value = self._source.get(key, _MISSING)
+        custom_value = self._custom.get(key, _MISSING) if self._custom is not None else _MISSING
+        if source_value is _MISSING and custom_value is _MISSING:
+            raise KeyError(key)
+
+        if custom_value is _MISSING:
+            value, custom_child = source_value, None
+        else:
+            value, custom_child = _merge_subject_value(source_value, custom_value)
+
+        path = self._path + (key,)
+        if isinstance(value, dict):
+            result = SubjectsView(value, custom_child, path, self._structure)
+        elif isinstance(value, list):
+            matcher = self._structure._matcher
+            if matcher is not None:
+                value = matcher.filter(value, path)
+            metadata = self._structure._metadata
+            result = []
+            for subject in value:
+                subject_entry = {"name": subject}
+                if metadata:
+                    subject_entry.update(metadata)
+                result.append(subject_entry)
+        else:
+            result = value
+        self._values[key] = result
+        return result
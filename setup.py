@@ -28,4 +28,9 @@ setup(
     python_requires='>=3.7',
     # No external dependencies as per plan
     install_requires=[],
+    entry_points={
+        "console_scripts": [
+            "course-model=course_model.cli:main",
+        ],
+    },
 )